@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+
+# Registry of every cache created, so their stats can be reported together.
+_caches: Dict[str, "TTLCache"] = {}
+
+# Registry of every single-flight group, for the same reason.
+_flights: Dict[str, "SingleFlight"] = {}
+
+
+class TTLCache:
+    """
+    A thread-safe, size-bounded LRU cache whose entries expire after a TTL.
+
+    `get_or_load` coalesces concurrent misses for the same key: the first
+    caller runs the loader and every other caller waits for its result, so
+    a burst of identical requests costs a single upstream fetch.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        _caches[name] = self
+
+    def _lookup(self, key: Hashable, now: float):
+        """Returns the live entry for a key. Caller must hold the lock."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._lookup(key, time.monotonic())
+        return entry[1] if entry else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Stores a value. A TTL of zero or less means it is not cached."""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def remaining(self, key: Hashable) -> Optional[float]:
+        """
+        Seconds until a key expires, or None if it is not cached. Does not
+        count as a use of the entry.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None:
+            return None
+        left = entry[0] - time.monotonic()
+        return left if left > 0 else None
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: Union[float, Callable[[Any], float], None] = None
+    ) -> Any:
+        """
+        Returns the cached value for a key, calling `loader` on a miss.
+        `ttl` may be a callable that picks the TTL from the loaded value.
+        """
+        with self._lock:
+            entry = self._lookup(key, time.monotonic())
+            if entry:
+                self.hits += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        self.set(key, value, ttl(value) if callable(ttl) else ttl)
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Returns the stats of every cache in the application."""
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one.
+
+    While a call for a key is running, every other caller with the same key
+    waits for it and receives its result (or exception) instead of making
+    its own call. Nothing is kept once the call finishes; pair it with a
+    cache when results should outlive the burst.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+        _flights[name] = self
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def count(self, shared: bool):
+        """
+        Counts a call shared without `do`, such as an asyncio task that
+        several requests await.
+        """
+        with self._lock:
+            if shared:
+                self.coalesced += 1
+            else:
+                self.calls += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._inflight),
+            }
+
+
+def flight_stats() -> Dict[str, Dict[str, Any]]:
+    """Returns the stats of every single-flight group in the application."""
+    return {name: flight.stats() for name, flight in _flights.items()}
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class UpstreamBusyError(Exception):
+    """Custom exception for when an upstream pool cannot accept more work."""
+    pass
+
+
+# Default sizing per upstream. Each value can be overridden with an
+# environment variable such as SWIPE_FINANCE_WORKERS or SWIPE_SEARCH_QUEUE.
+POOL_SETTINGS = {
+    "finance": {"workers": 16, "queue": 64},
+    "search": {"workers": 8, "queue": 32},
+    "news": {"workers": 8, "queue": 32},
+    # Individual result pages fetched in parallel for a single search call.
+    # Kept apart from "search" so a search never waits on its own pool.
+    "search_pages": {"workers": 24, "queue": 128},
+    # Single-backend calls that make up each page, including hedges.
+    "search_backends": {"workers": 48, "queue": 256},
+    # Background sentiment scoring of freshly fetched news feeds.
+    "sentiment": {"workers": 2, "queue": 16},
+    # Per-ticker quote lookups fanned out by finance batch requests, and
+    # the queries of search batch requests. Kept apart from the pools the
+    # batch calls themselves run on, so a batch never waits on its own pool.
+    "finance_batch": {"workers": 16, "queue": 256},
+    "search_batch": {"workers": 8, "queue": 128},
+}
+
+# Number of recent queue-wait samples kept per pool for the metrics.
+WAIT_SAMPLE_SIZE = 512
+
+
+def _setting(name: str, key: str) -> int:
+    """Reads a pool setting, preferring the environment over the defaults."""
+    env_value = os.environ.get(f"SWIPE_{name.upper()}_{key.upper()}")
+    if env_value:
+        return max(1, int(env_value))
+    return POOL_SETTINGS[name][key]
+
+
+class UpstreamPool:
+    """
+    A bounded thread pool dedicated to one upstream provider.
+
+    Blocking service calls are dispatched here so they never run on the
+    event loop. A separate pool per upstream keeps a backlog on one provider
+    from starving the others, and the queue limit turns overload into a
+    fast rejection instead of an ever-growing wait.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"upstream-{name}"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._waits = deque(maxlen=WAIT_SAMPLE_SIZE)
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Queues a call on the pool, rejecting it if the queue is full."""
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise UpstreamBusyError(
+                    f"The {self.name} service is overloaded. Please retry shortly."
+                )
+            self._queued += 1
+            self._submitted += 1
+
+        enqueued_at = time.monotonic()
+
+        def task():
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._waits.append(time.monotonic() - enqueued_at)
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                with self._lock:
+                    self._failed += 1
+                raise
+            else:
+                with self._lock:
+                    self._completed += 1
+                return result
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+        def release_if_cancelled(future: Future):
+            # A call cancelled before it started never reaches `task`, so its
+            # queue slot has to be given back here.
+            if future.cancelled():
+                with self._lock:
+                    self._queued -= 1
+
+        future = self._executor.submit(task)
+        future.add_done_callback(release_if_cancelled)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs a blocking call on the pool and awaits its result."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns a snapshot of the pool's load and queue-wait metrics."""
+        with self._lock:
+            waits = sorted(self._waits)
+            snapshot = {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": self._queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+        if waits:
+            snapshot["queue_wait_ms"] = {
+                "avg": round(sum(waits) / len(waits) * 1000, 3),
+                "p50": round(waits[(len(waits) - 1) // 2] * 1000, 3),
+                "p95": round(waits[int((len(waits) - 1) * 0.95)] * 1000, 3),
+                "max": round(waits[-1] * 1000, 3),
+            }
+        else:
+            snapshot["queue_wait_ms"] = None
+        return snapshot
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pools: Dict[str, UpstreamPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str) -> UpstreamPool:
+    """Returns the pool for an upstream, creating it on first use."""
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = UpstreamPool(
+                    name, _setting(name, "workers"), _setting(name, "queue")
+                )
+                _pools[name] = pool
+    return pool
+
+
+def submit_all(name: str, calls: List[Tuple[Callable[..., Any], tuple, dict]]) -> List[Future]:
+    """
+    Queues several (fn, args, kwargs) calls on the named pool. If the pool
+    rejects one, the calls already queued are cancelled and the
+    UpstreamBusyError is raised, so a batch is accepted whole or not at all.
+    """
+    pool = get_pool(name)
+    futures = []
+    try:
+        for fn, args, kwargs in calls:
+            futures.append(pool.submit(fn, *args, **kwargs))
+    except UpstreamBusyError:
+        for future in futures:
+            future.cancel()
+        raise
+    return futures
+
+
+async def run_upstream(name: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs a blocking service call on the named upstream's pool."""
+    return await get_pool(name).run(fn, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Returns the metrics of every upstream pool."""
+    return {name: get_pool(name).stats() for name in POOL_SETTINGS}
+
+
+def shutdown_executors():
+    """Stops all pools. Called when the application shuts down."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+
+# Methods accepted by the `downsample` parameter of `/finance/{ticker}`.
+# `lttb` keeps the visually significant bars, `ohlc` merges bars into candles.
+DOWNSAMPLE_METHODS = ["lttb", "ohlc"]
+
+# How each column is combined when bars are merged into a wider candle.
+# Columns not listed here, such as indicators, keep their last value.
+OHLC_AGGREGATIONS = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+    "Dividends": "sum",
+    "Stock Splits": "sum",
+}
+
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Picks `n_out` row positions with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The points in between are
+    split into `n_out - 2` buckets, and each bucket keeps the point forming
+    the largest triangle with the previously kept point and the average of
+    the next bucket. Only the walk across buckets is a Python loop; the
+    bucket averages and triangle areas are computed with NumPy.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    # Bucket edges over the interior points [1, n - 1)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    starts, ends = edges[:-1], edges[1:]
+    counts = ends - starts
+    avg_x = np.add.reduceat(x[:-1], starts) / counts
+    avg_y = np.add.reduceat(y[:-1], starts) / counts
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = starts[i], ends[i]
+        if i + 1 < n_out - 2:
+            cx, cy = avg_x[i + 1], avg_y[i + 1]
+        else:
+            cx, cy = x[-1], y[-1]
+        # Doubled triangle areas for every candidate in the bucket at once
+        area = np.abs(
+            (x[a] - cx) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (cy - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def aggregate_ohlc(frame: pd.DataFrame, n_out: int) -> pd.DataFrame:
+    """
+    Merges consecutive bars into `n_out` candles of (nearly) equal size.
+    Each candle is stamped with the time of its first bar.
+    """
+    n = len(frame)
+    if n_out >= n:
+        return frame
+    buckets = np.arange(n) * n_out // n
+    rules = {col: OHLC_AGGREGATIONS.get(col, "last") for col in frame.columns}
+    merged = frame.groupby(buckets).agg(rules)
+    merged.index = frame.index[np.searchsorted(buckets, np.arange(n_out))]
+    return merged
+
+
+def downsample_history(frame: pd.DataFrame, max_points: int, method: str) -> pd.DataFrame:
+    """Reduces a history frame to at most `max_points` rows."""
+    if frame is None or len(frame) <= max_points:
+        return frame
+    if method == "ohlc":
+        return aggregate_ohlc(frame, max_points)
+    # LTTB follows the close line; gaps are filled so they don't skew areas
+    close = frame["Close"].astype(float).ffill().bfill().to_numpy()
+    return frame.iloc[lttb_indices(close, max_points)]
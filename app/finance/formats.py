@@ -0,0 +1,80 @@
+import io
+from typing import Any, Dict, Iterator, List
+
+import pandas as pd
+import pyarrow as pa
+
+
+# Output formats accepted by the `format` parameter of `/finance/{ticker}`.
+# `json` is the original row-per-bar layout.
+HISTORY_FORMATS = ["json", "columnar", "csv", "arrow"]
+
+# Formats that return only the history table as a streamed body.
+STREAMING_FORMATS = {"csv", "arrow"}
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# Rows serialized per streamed chunk.
+CHUNK_ROWS = 5000
+
+
+def history_frame(hist_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Moves the bar timestamps of a yfinance history frame into a `date`
+    column, keeping them as datetimes rather than formatted strings.
+    """
+    if hist_df is None or hist_df.empty:
+        return pd.DataFrame(columns=["date"])
+    hist_df = hist_df.reset_index()
+    # Find the date column, which can have different names
+    date_col = next(
+        (col for col in hist_df.columns if 'Date' in col), None
+    )
+    if not date_col:
+        return pd.DataFrame(columns=["date"])
+    return hist_df.rename(columns={date_col: "date"})
+
+
+def history_to_columns(frame: pd.DataFrame) -> Dict[str, List[Any]]:
+    """
+    Builds the columnar layout: one array per column, with the bar times as
+    epoch seconds under `timestamp` and missing values as null.
+    """
+    if frame.empty:
+        return {"timestamp": []}
+    dates = pd.DatetimeIndex(frame["date"])
+    # Subtracting the epoch keeps this independent of the index resolution
+    epoch = pd.Timestamp(0, tz="UTC") if dates.tz is not None else pd.Timestamp(0)
+    columns = {"timestamp": ((dates - epoch) // pd.Timedelta(seconds=1)).tolist()}
+    for col in frame.columns.drop("date"):
+        series = frame[col]
+        if series.isna().any():
+            series = series.astype(object).where(series.notna(), None)
+        columns[col] = series.tolist()
+    return columns
+
+
+def iter_csv(frame: pd.DataFrame) -> Iterator[str]:
+    """Yields the history as CSV, one chunk of rows at a time."""
+    yield frame.iloc[:0].to_csv(index=False)
+    for offset in range(0, len(frame), CHUNK_ROWS):
+        yield frame.iloc[offset:offset + CHUNK_ROWS].to_csv(
+            index=False, header=False, date_format='%Y-%m-%d %H:%M:%S'
+        )
+
+
+def iter_arrow(frame: pd.DataFrame) -> Iterator[bytes]:
+    """Yields the history as an Arrow IPC stream, one record batch at a time."""
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=CHUNK_ROWS):
+            writer.write_batch(batch)
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    # Closing the writer appends the end-of-stream marker
+    yield sink.getvalue()
@@ -0,0 +1,276 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Where the store keeps its files. Serverless hosts only allow writes to the
+# temp directory, so that is the default.
+HISTORY_STORE_DIR = os.environ.get(
+    "SWIPE_HISTORY_DIR",
+    os.path.join(tempfile.gettempdir(), "swipeapis", "history")
+)
+
+# Only daily bars are stored. Intraday ranges are limited upstream anyway,
+# and weekly/monthly bars do not line up with arbitrary gap boundaries.
+STORABLE_INTERVALS = {"1d"}
+
+# How far before a gap the refetch starts, so that it overlaps at least one
+# stored trading day and split/dividend re-adjustments can be detected.
+OVERLAP_DAYS = 7
+
+# Columns Yahoo re-bases after a split or dividend. Unadjusted bars still
+# carry `Adj Close`, so both kinds of series can go stale.
+ADJUSTED_COLUMNS = ("Close", "Adj Close")
+
+DateRange = Tuple[date, date]
+
+
+def today_utc() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def sessions_to_days(sessions: int) -> int:
+    """
+    Returns a number of calendar days that holds at least the given number
+    of trading sessions, allowing for weekends and holidays.
+    """
+    return sessions * 7 // 5 + 7
+
+
+def resolve_history_range(
+    history_days: int,
+    start_date: Optional[str],
+    end_date: Optional[str]
+) -> DateRange:
+    """
+    Turns the endpoint's history parameters into a [start, end) date range.
+    As with yfinance, start/end dates take priority over `history_days`.
+    `history_days` counts trading sessions like yfinance's `period`, so its
+    range is wide enough to hold them and callers keep the last ones.
+    """
+    tomorrow = today_utc() + timedelta(days=1)
+    if start_date:
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date) if end_date else tomorrow
+    else:
+        start = tomorrow - timedelta(days=sessions_to_days(history_days))
+        end = tomorrow
+    return start, end
+
+
+def missing_ranges(covered: List[DateRange], start: date, end: date) -> List[DateRange]:
+    """Returns the parts of [start, end) that are not in the covered ranges."""
+    gaps = []
+    cursor = start
+    for range_start, range_end in covered:
+        if range_end <= cursor:
+            continue
+        if range_start >= end:
+            break
+        if range_start > cursor:
+            gaps.append((cursor, range_start))
+        cursor = max(cursor, range_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def add_range(covered: List[DateRange], start: date, end: date) -> List[DateRange]:
+    """Adds [start, end) to a sorted range list, merging touching ranges."""
+    if start >= end:
+        return covered
+    merged = []
+    for range_start, range_end in sorted(covered + [(start, end)]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+        else:
+            merged.append((range_start, range_end))
+    return merged
+
+
+def bar_dates(index: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """Returns a bar index as naive dates so it compares to plain dates."""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+class HistoryStore:
+    """
+    A persistent, incremental store of daily OHLCV bars.
+
+    Bars are kept in one Parquet file per (ticker, interval, adjusted) along
+    with a JSON sidecar listing the date ranges already held. A request only
+    fetches the gaps from yfinance, plus today's still-open bar which is
+    never marked as held, and the rest is read from disk.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self.local_reads = 0
+        self.gap_fetches = 0
+        self.resets = 0
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.root, key)
+        return base + ".parquet", base + ".json"
+
+    def _load(self, key: str) -> Tuple[Optional[pd.DataFrame], List[DateRange]]:
+        data_path, meta_path = self._paths(key)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None, []
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            frame = pd.read_parquet(data_path)
+        except Exception:
+            # A corrupt or half-written entry is simply rebuilt from upstream
+            return None, []
+        covered = [
+            (date.fromisoformat(start), date.fromisoformat(end))
+            for start, end in meta.get("ranges", [])
+        ]
+        return frame, covered
+
+    def _temp_path(self, key: str) -> str:
+        """
+        A new, uniquely named file next to the store's files. The lock per
+        key only covers this process, so every writer needs its own.
+        """
+        fd, path = tempfile.mkstemp(prefix=f"{key}.", suffix=".tmp", dir=self.root)
+        os.close(fd)
+        return path
+
+    def _save(self, key: str, frame: pd.DataFrame, covered: List[DateRange]):
+        os.makedirs(self.root, exist_ok=True)
+        data_path, meta_path = self._paths(key)
+        # Write to temporary files first so readers never see partial data
+        data_tmp, meta_tmp = self._temp_path(key), self._temp_path(key)
+        try:
+            frame.to_parquet(data_tmp)
+            with open(meta_tmp, "w") as f:
+                json.dump({
+                    "ranges": [[start.isoformat(), end.isoformat()] for start, end in covered]
+                }, f)
+            os.replace(data_tmp, data_path)
+            os.replace(meta_tmp, meta_path)
+        finally:
+            for path in (data_tmp, meta_tmp):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    @staticmethod
+    def _adjustments_changed(stored: pd.DataFrame, fetched: pd.DataFrame, before: date) -> bool:
+        """
+        Checks whether adjusted closes differ on the overlapping closed days,
+        which means a split or dividend re-based the whole adjusted series.
+        """
+        common = stored.index.intersection(fetched.index)
+        common = common[bar_dates(common) < pd.Timestamp(before)]
+        if common.empty:
+            return False
+        return any(
+            not np.allclose(
+                stored.loc[common, column].to_numpy(dtype=float),
+                fetched.loc[common, column].to_numpy(dtype=float),
+                rtol=1e-6, equal_nan=True
+            )
+            for column in ADJUSTED_COLUMNS
+            if column in stored.columns and column in fetched.columns
+        )
+
+    def get_history(
+        self,
+        stock: Any,
+        symbol: str,
+        start: date,
+        end: date,
+        interval: str,
+        adjusted: bool
+    ) -> pd.DataFrame:
+        """Returns the bars in [start, end), fetching only what is missing."""
+        key = f"{symbol}_{interval}_{'adj' if adjusted else 'raw'}"
+        with self._lock_for(key):
+            frame, covered = self._load(key)
+            if frame is None:
+                covered = []
+            gaps = missing_ranges(covered, start, end)
+
+            if not gaps:
+                self.local_reads += 1
+            else:
+                today = today_utc()
+                for gap_start, gap_end in gaps:
+                    fetch_start = gap_start
+                    if covered and gap_start > covered[0][0]:
+                        fetch_start = gap_start - timedelta(days=OVERLAP_DAYS)
+
+                    fetched = stock.history(
+                        start=fetch_start.isoformat(), end=gap_end.isoformat(),
+                        interval=interval, auto_adjust=adjusted
+                    )
+                    self.gap_fetches += 1
+
+                    if (
+                        frame is not None and not fetched.empty
+                        and self._adjustments_changed(frame, fetched, today)
+                    ):
+                        # Stored adjusted prices are stale, so start over
+                        # with just the requested range.
+                        self.resets += 1
+                        frame = stock.history(
+                            start=start.isoformat(), end=end.isoformat(),
+                            interval=interval, auto_adjust=adjusted
+                        )
+                        covered = (
+                            add_range([], start, min(end, today)) if not frame.empty else []
+                        )
+                        break
+
+                    # yfinance reports network errors as an empty frame, so
+                    # an empty answer only counts as "no bars" for dates
+                    # before the first bar held, i.e. before the listing
+                    held_before = (
+                        fetched.empty and frame is not None and not frame.empty
+                        and gap_end <= bar_dates(frame.index).min().date()
+                    )
+
+                    if frame is None or frame.empty:
+                        frame = fetched
+                    elif not fetched.empty:
+                        frame = pd.concat([frame, fetched])
+                        frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+
+                    # Today's bar is still open, so it is never marked as held
+                    if not fetched.empty or held_before:
+                        covered = add_range(covered, gap_start, min(gap_end, today))
+
+                self._save(key, frame, covered)
+
+        if frame is None or frame.empty:
+            return pd.DataFrame()
+        dates = bar_dates(frame.index)
+        mask = (dates >= pd.Timestamp(start)) & (dates < pd.Timestamp(end))
+        return frame[mask]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "local_reads": self.local_reads,
+            "gap_fetches": self.gap_fetches,
+            "resets": self.resets,
+        }
+
+
+history_store = HistoryStore(HISTORY_STORE_DIR)
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+
+
+class InvalidIndicatorError(Exception):
+    """Custom exception for an unknown or malformed indicator spec."""
+    pass
+
+
+# Supported indicators with their default parameters, in spec order.
+# A spec is written as `name` or `name:param1:param2`, e.g. `macd:12:26:9`.
+INDICATOR_DEFAULTS = {
+    "sma": (20,),
+    "ema": (20,),
+    "rsi": (14,),
+    "macd": (12, 26, 9),
+    "bbands": (20, 2),
+    "returns": (),
+    "volatility": (20,),
+}
+
+# Parameters that are not window lengths, by indicator and position. Every
+# other parameter counts bars and must be a whole number.
+FLOAT_PARAMS = {"bbands": {1}}
+
+# Longest window accepted, in bars. Windows are warmed up with several
+# times their length of earlier bars, which must stay a sane fetch.
+MAX_INDICATOR_WINDOW = 1000
+
+# Trading periods per year, used to annualize volatility.
+PERIODS_PER_YEAR = 252
+
+IndicatorSpec = Tuple[str, Tuple[float, ...]]
+
+
+def parse_indicators(indicators: str) -> List[IndicatorSpec]:
+    """Parses a comma-separated indicator list such as `sma:50,rsi,macd`."""
+    specs = []
+    for raw in indicators.split(","):
+        raw = raw.strip().lower()
+        if not raw:
+            continue
+        name, *params = raw.split(":")
+        if name not in INDICATOR_DEFAULTS:
+            raise InvalidIndicatorError(
+                f"Unknown indicator '{name}'. "
+                f"Available indicators: {', '.join(INDICATOR_DEFAULTS)}."
+            )
+        defaults = INDICATOR_DEFAULTS[name]
+        if len(params) > len(defaults):
+            raise InvalidIndicatorError(
+                f"Indicator '{name}' takes at most {len(defaults)} parameters."
+            )
+        try:
+            values = tuple(float(p) for p in params) + defaults[len(params):]
+        except ValueError:
+            raise InvalidIndicatorError(
+                f"Invalid parameters for indicator '{raw}'."
+            )
+        if not all(np.isfinite(v) and v > 0 for v in values):
+            raise InvalidIndicatorError(
+                f"Parameters for indicator '{raw}' must be positive numbers."
+            )
+        windows = [
+            v for i, v in enumerate(values) if i not in FLOAT_PARAMS.get(name, ())
+        ]
+        if not all(v.is_integer() and v <= MAX_INDICATOR_WINDOW for v in windows):
+            raise InvalidIndicatorError(
+                f"Windows for indicator '{raw}' must be whole numbers of bars, "
+                f"at most {MAX_INDICATOR_WINDOW}."
+            )
+        specs.append((name, values))
+    if not specs:
+        raise InvalidIndicatorError("At least one indicator must be provided.")
+    return specs
+
+
+def lookback_bars(specs: List[IndicatorSpec]) -> int:
+    """The number of bars needed before a range for every indicator to be warm."""
+    longest = 1
+    for name, params in specs:
+        if name == "macd":
+            longest = max(longest, int(params[1] + params[2]))
+        elif params:
+            longest = max(longest, int(params[0]))
+    # EMA-based indicators keep converging well past their window length
+    return longest * 3
+
+
+def _label(name: str, params: Tuple[float, ...]) -> str:
+    return "_".join([name] + [f"{p:g}" for p in params])
+
+
+def _rsi(close: pd.Series, window: int) -> pd.Series:
+    # Wilder's smoothing is an EMA with alpha = 1 / window
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / window, adjust=False, min_periods=window).mean()
+    rs = gain / loss
+    return 100 - 100 / (1 + rs)
+
+
+def compute_indicators(hist_df: pd.DataFrame, specs: List[IndicatorSpec]) -> pd.DataFrame:
+    """
+    Computes the requested indicators over a history frame. Every indicator
+    is a vectorized rolling or exponential window over the close column, and
+    the result shares the history frame's index.
+    """
+    close = hist_df["Close"].astype(float)
+    columns: Dict[str, pd.Series] = {}
+
+    for name, params in specs:
+        label = _label(name, params)
+        if name == "sma":
+            columns[label] = close.rolling(int(params[0])).mean()
+        elif name == "ema":
+            columns[label] = close.ewm(span=params[0], adjust=False, min_periods=int(params[0])).mean()
+        elif name == "rsi":
+            columns[label] = _rsi(close, int(params[0]))
+        elif name == "macd":
+            fast, slow, signal = params
+            macd = (
+                close.ewm(span=fast, adjust=False).mean()
+                - close.ewm(span=slow, adjust=False).mean()
+            )
+            macd_signal = macd.ewm(span=signal, adjust=False).mean()
+            columns[label] = macd
+            columns[f"{label}_signal"] = macd_signal
+            columns[f"{label}_hist"] = macd - macd_signal
+        elif name == "bbands":
+            window, width = int(params[0]), params[1]
+            rolling = close.rolling(window)
+            middle = rolling.mean()
+            band = rolling.std() * width
+            columns[f"{label}_middle"] = middle
+            columns[f"{label}_upper"] = middle + band
+            columns[f"{label}_lower"] = middle - band
+        elif name == "returns":
+            columns[label] = close.pct_change()
+        elif name == "volatility":
+            log_returns = np.log(close).diff()
+            columns[label] = (
+                log_returns.rolling(int(params[0])).std() * np.sqrt(PERIODS_PER_YEAR)
+            )
+
+    return pd.DataFrame(columns, index=hist_df.index)
@@ -1,11 +1,235 @@
-from fastapi import APIRouter, HTTPException, Query, Path, Request
-from typing import Optional
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Query, Path, Request, \
+    WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List
 from .services import get_finance_data_service, TickerNotFoundError, \
-    YFinanceError
+    YFinanceError, get_batch_finance_data_service, get_indicators_service, \
+    normalize_ticker, parse_requested_fields, plan_fetches, quote_prefetch_key, \
+    FIELD_MAPPING
+from .indicators import InvalidIndicatorError, INDICATOR_DEFAULTS
+from .downsample import DOWNSAMPLE_METHODS
+from .streaming import quote_hub, parse_stream_tickers, \
+    SUBSCRIBER_QUEUE_SIZE, MAX_STREAM_TICKERS
+from .formats import HISTORY_FORMATS, STREAMING_FORMATS, MEDIA_TYPES, \
+    iter_csv, iter_arrow
 from app.limiter import limiter
+from app.executor import run_upstream, UpstreamBusyError
+from app.prefetch import prefetcher
 
 router = APIRouter()
 
+# Seconds between keep-alive comments on an idle event stream.
+SSE_KEEPALIVE_INTERVAL = 15
+
+
+class BatchRequest(BaseModel):
+    """Request body for the POST variant of the batch endpoint."""
+    tickers: List[str] = Field(..., description="The stock ticker symbols to fetch.")
+    fields: Optional[List[str]] = Field(
+        None, description="The fields to return for each ticker. Defaults to the standard set."
+    )
+    history_days: int = Field(0, ge=0, description="The number of days of historical data.")
+    start_date: Optional[str] = Field(None, description="The start date for historical data (YYYY-MM-DD).")
+    end_date: Optional[str] = Field(None, description="The end date for historical data (YYYY-MM-DD).")
+    interval: str = Field("1d", description="The interval for historical data.")
+    adjusted: bool = Field(True, description="Set to false to get unadjusted historical data.")
+
+
+async def _run_batch(**kwargs):
+    """Runs the batch service on the finance pool and maps its errors."""
+    info_fields = [
+        field for field in parse_requested_fields(kwargs["fields"])
+        if field in FIELD_MAPPING
+    ]
+    for ticker in kwargs["tickers"]:
+        if ticker.strip():
+            prefetcher.record(
+                "finance", quote_prefetch_key(normalize_ticker(ticker), info_fields)
+            )
+    try:
+        return await run_upstream(
+            "finance", get_batch_finance_data_service, **kwargs
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UpstreamBusyError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"An unexpected error occurred: {e}"
+        )
+
+
+# The batch routes are declared before `/{ticker}` so "batch" is not
+# mistaken for a ticker symbol.
+@router.get("/batch", response_model=dict)
+@limiter.limit("30/minute")
+async def get_batch_finance_data(
+    request: Request,
+    tickers: str = Query(
+        ..., description="A comma-separated list of stock ticker symbols (e.g., AAPL,MSFT)."
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="A comma-separated list of fields to return for each ticker. "
+                    "If not specified, a default set of fields is returned."
+    ),
+    history_days: int = Query(
+        0, ge=0, description="The number of days of historical price data to fetch. Deprecated if start_date is used."
+    ),
+    start_date: Optional[str] = Query(
+        None, description="The start date for historical data (YYYY-MM-DD)."
+    ),
+    end_date: Optional[str] = Query(
+        None, description="The end date for historical data (YYYY-MM-DD)."
+    ),
+    interval: str = Query(
+        "1d",
+        description="The interval for historical data (e.g., '1m', '5m', '1d', '1wk')."
+    ),
+    adjusted: bool = Query(
+        True, description="Set to false to get unadjusted historical data."
+    )
+):
+    """
+    Fetches quotes, and optionally history, for several tickers in one call.
+
+    Tickers that cannot be fetched are listed under `errors` while the
+    remaining tickers are still returned under `results`.
+    """
+    return await _run_batch(
+        tickers=tickers.split(","),
+        fields=fields,
+        history_days=history_days,
+        start_date=start_date,
+        end_date=end_date,
+        interval=interval,
+        adjusted=adjusted
+    )
+
+
+@router.post("/batch", response_model=dict)
+@limiter.limit("30/minute")
+async def post_batch_finance_data(request: Request, body: BatchRequest):
+    """
+    Same as `GET /finance/batch`, with the tickers given in a JSON body.
+    """
+    return await _run_batch(
+        tickers=body.tickers,
+        fields=",".join(body.fields) if body.fields else None,
+        history_days=body.history_days,
+        start_date=body.start_date,
+        end_date=body.end_date,
+        interval=body.interval,
+        adjusted=body.adjusted
+    )
+
+
+@router.get("/stream")
+@limiter.limit("10/minute")
+async def stream_quotes(
+    request: Request,
+    tickers: str = Query(
+        ..., description="A comma-separated list of stock ticker symbols to follow (e.g., AAPL,MSFT)."
+    )
+):
+    """
+    Streams live quote updates as Server-Sent Events.
+
+    Each event is a JSON object with the ticker and only the fields that
+    changed since its previous update. The first event per ticker carries
+    the full quote.
+    """
+    try:
+        symbols = parse_stream_tickers(tickers.split(","))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        quote_hub.subscribe(queue, symbols)
+        try:
+            while not await request.is_disconnected():
+                try:
+                    update = await asyncio.wait_for(
+                        queue.get(), timeout=SSE_KEEPALIVE_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    # Comments keep proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(update)}\n\n"
+        finally:
+            quote_hub.unsubscribe(queue, symbols)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def quotes_websocket(websocket: WebSocket):
+    """
+    Streams live quote updates over a WebSocket.
+
+    Clients send `{"action": "subscribe", "tickers": [...]}` or
+    `{"action": "unsubscribe", "tickers": [...]}` and receive the same
+    update objects as the event stream.
+    """
+    await websocket.accept()
+    queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    subscribed = set()
+
+    async def receive_commands():
+        while True:
+            message = await websocket.receive_json()
+            action = message.get("action") if isinstance(message, dict) else None
+            try:
+                symbols = parse_stream_tickers(message.get("tickers") or [])
+            except (AttributeError, TypeError, ValueError) as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+            if action == "subscribe":
+                if len(subscribed | set(symbols)) > MAX_STREAM_TICKERS:
+                    await websocket.send_json({
+                        "error": f"A stream can follow at most {MAX_STREAM_TICKERS} tickers."
+                    })
+                    continue
+                new_symbols = [s for s in symbols if s not in subscribed]
+                subscribed.update(new_symbols)
+                quote_hub.subscribe(queue, new_symbols)
+            elif action == "unsubscribe":
+                subscribed.difference_update(symbols)
+                quote_hub.unsubscribe(queue, symbols)
+            else:
+                await websocket.send_json({
+                    "error": "Unknown action. Use 'subscribe' or 'unsubscribe'."
+                })
+
+    async def send_updates():
+        while True:
+            await websocket.send_json(await queue.get())
+
+    tasks = [
+        asyncio.create_task(receive_commands()),
+        asyncio.create_task(send_updates()),
+    ]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        quote_hub.unsubscribe(queue, subscribed)
+
 
 @router.get("/{ticker}", response_model=dict)
 @limiter.limit("60/minute")
@@ -36,6 +260,34 @@ async def get_finance_data(
     ),
     adjusted: bool = Query(
         True, description="Set to false to get unadjusted historical data."
+    ),
+    response_format: str = Query(
+        "json",
+        alias="format",
+        pattern=f"^({'|'.join(HISTORY_FORMATS)})$",
+        description="The layout of historical data: 'json' (one object per bar), "
+                    "'columnar' (one array per column, epoch timestamps), "
+                    "or 'csv'/'arrow' to stream only the historical data."
+    ),
+    indicators: Optional[str] = Query(
+        None,
+        description="A comma-separated list of technical indicators computed over the "
+                    "historical data, each optionally with parameters "
+                    "(e.g., 'sma:50,rsi:14,macd:12:26:9'). "
+                    f"Available indicators: {', '.join(INDICATOR_DEFAULTS)}."
+    ),
+    indicators_only: bool = Query(
+        False, description="Set to true to return the indicator series without the raw bars."
+    ),
+    max_points: Optional[int] = Query(
+        None, ge=3,
+        description="Downsample historical data to at most this many points, e.g. to fit a chart."
+    ),
+    downsample: str = Query(
+        "lttb",
+        pattern=f"^({'|'.join(DOWNSAMPLE_METHODS)})$",
+        description="How to downsample when max_points is set: 'lttb' keeps the bars that "
+                    "best preserve the shape of the close line, 'ohlc' merges bars into wider candles."
     )
 ):
     """
@@ -44,8 +296,23 @@ async def get_finance_data(
     This endpoint provides real-time data fields, historical price data,
     and analyst recommendations.
     """
+    if response_format in STREAMING_FORMATS and not (history_days > 0 or start_date):
+        raise HTTPException(
+            status_code=400,
+            detail=f"format={response_format} requires history_days or start_date."
+        )
+
+    plan = plan_fetches(
+        fields, history_days, start_date, end_date, False, response_format
+    )
+    if plan.info:
+        prefetcher.record(
+            "finance", quote_prefetch_key(normalize_ticker(ticker), plan.info_fields)
+        )
     try:
-        data = get_finance_data_service(
+        data = await run_upstream(
+            "finance",
+            get_finance_data_service,
             ticker=ticker,
             fields=fields,
             history_days=history_days,
@@ -53,14 +320,118 @@ async def get_finance_data(
             end_date=end_date,
             interval=interval,
             include_recommendations=include_recommendations,
-            adjusted=adjusted
+            adjusted=adjusted,
+            history_format=response_format,
+            indicators=indicators,
+            indicators_only=indicators_only,
+            max_points=max_points,
+            downsample=downsample
         )
-        return data
+    except InvalidIndicatorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except TickerNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except YFinanceError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except UpstreamBusyError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"An unexpected error occurred: {e}"
+        )
+
+    return _history_response(data, "historical", response_format)
+
+
+@router.get("/{ticker}/indicators", response_model=dict)
+@limiter.limit("60/minute")
+async def get_indicators(
+    request: Request,
+    ticker: str = Path(..., description="The stock ticker symbol (e.g., AAPL, GOOGL)."),
+    indicators: str = Query(
+        ...,
+        description="A comma-separated list of technical indicators, each optionally with "
+                    "parameters (e.g., 'sma:50,rsi:14,macd:12:26:9'). "
+                    f"Available indicators: {', '.join(INDICATOR_DEFAULTS)}."
+    ),
+    history_days: int = Query(
+        90, ge=0, description="The number of days of data to compute indicators over. Deprecated if start_date is used."
+    ),
+    start_date: Optional[str] = Query(
+        None, description="The start date for the indicator series (YYYY-MM-DD)."
+    ),
+    end_date: Optional[str] = Query(
+        None, description="The end date for the indicator series (YYYY-MM-DD)."
+    ),
+    interval: str = Query(
+        "1d",
+        description="The interval of the underlying bars (e.g., '1h', '1d', '1wk')."
+    ),
+    adjusted: bool = Query(
+        True, description="Set to false to compute over unadjusted prices."
+    ),
+    response_format: str = Query(
+        "json",
+        alias="format",
+        pattern=f"^({'|'.join(HISTORY_FORMATS)})$",
+        description="The layout of the indicator series: 'json', 'columnar', 'csv' or 'arrow'."
+    )
+):
+    """
+    Computes technical indicators server-side and returns only their series,
+    so charts can draw indicator lines without downloading the raw bars.
+    """
+    try:
+        data = await run_upstream(
+            "finance",
+            get_indicators_service,
+            ticker=ticker,
+            indicators=indicators,
+            history_days=history_days,
+            start_date=start_date,
+            end_date=end_date,
+            interval=interval,
+            adjusted=adjusted,
+            history_format=response_format
+        )
+    except InvalidIndicatorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except TickerNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except YFinanceError as e:
         raise HTTPException(status_code=503, detail=str(e))
+    except UpstreamBusyError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
         )
+
+    return _history_response(data, "indicators", response_format)
+
+
+def _history_response(data: dict, key: str, response_format: str):
+    """
+    Returns the service data as-is, or streams its table under `key` for
+    the CSV and Arrow formats.
+    """
+    if response_format not in STREAMING_FORMATS:
+        return data
+
+    table = data[key]
+    if isinstance(table, dict):
+        # The history fetch failed and the service reported the error
+        raise HTTPException(status_code=503, detail=table["error"])
+    stream = iter_csv(table) if response_format == "csv" else iter_arrow(table)
+    return StreamingResponse(
+        stream,
+        media_type=MEDIA_TYPES[response_format],
+        headers={
+            "Content-Disposition":
+                f'attachment; filename="{data["ticker"]}.{response_format}"'
+        }
+    )
@@ -1,5 +1,18 @@
+import pandas as pd
 import yfinance as yf
-from typing import Optional, Dict, Any
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Hashable, List, Tuple
+from zoneinfo import ZoneInfo
+from app.cache import TTLCache
+from app.executor import run_upstream, submit_all
+from app.prefetch import prefetcher, PrefetchTarget
+from .history_store import history_store, resolve_history_range, \
+    STORABLE_INTERVALS, bar_dates, today_utc, sessions_to_days
+from .formats import history_frame, history_to_columns, STREAMING_FORMATS
+from .downsample import downsample_history
+from .indicators import parse_indicators, compute_indicators, lookback_bars, \
+    IndicatorSpec, InvalidIndicatorError
 
 
 # Mapping from user-friendly field names to yfinance keys
@@ -21,11 +34,64 @@ FIELD_MAPPING = {
     "payout_ratio": "payoutRatio",
 }
 
+# Fields that yfinance's lighter `fast_info` can serve, mapped to its keys.
+# Requests that only ask for these skip the slower `.info` scrape.
+FAST_INFO_MAPPING = {
+    "price": "last_price",
+    "previous_close": "previous_close",
+    "open": "open",
+    "volume": "last_volume",
+    "market_cap": "market_cap",
+    "52_week_high": "year_high",
+    "52_week_low": "year_low",
+    "average_volume": "three_month_average_volume",
+}
+
 DEFAULT_FIELDS = [
     "price", "previous_close", "market_cap", "pe_ratio", "52_week_high", "52_week_low"
 ]
 
 
+# Quote cache settings. Prices move while the exchange is trading, so quotes
+# are only kept briefly then, and much longer once the market has closed.
+QUOTE_TTL_OPEN = 15
+QUOTE_TTL_CLOSED = 900
+QUOTE_CACHE_SIZE = 2048
+
+# The most requested tickers kept warm by the prefetcher, and how many
+# seconds before their quote expires it is refetched.
+PREFETCH_TICKERS = 25
+QUOTE_PREFETCH_LEAD = 5
+
+# Yahoo market states during which quotes are still changing.
+ACTIVE_MARKET_STATES = {"PRE", "REGULAR", "POST"}
+
+# Cache of `Ticker.info` dicts keyed by normalized ticker symbol.
+quote_cache = TTLCache("finance_quotes", maxsize=QUOTE_CACHE_SIZE, ttl=QUOTE_TTL_OPEN)
+
+# Cache of `.info`-shaped dicts built from `fast_info`, keyed by ticker
+# symbol and the set of fields they hold.
+fast_quote_cache = TTLCache(
+    "finance_fast_quotes", maxsize=QUOTE_CACHE_SIZE, ttl=QUOTE_TTL_OPEN
+)
+
+# Upper bound on tickers per batch request. Their `.info` fetches run on
+# the shared "finance_batch" pool.
+MAX_BATCH_TICKERS = 100
+
+# Computed indicators are cached briefly while their range includes the
+# still-open bar, and much longer for ranges that have already closed.
+INDICATOR_TTL_OPEN = 60
+INDICATOR_TTL_CLOSED = 3600
+INDICATOR_CACHE_SIZE = 256
+
+# Cache of (history, indicators) frame pairs keyed by ticker, interval,
+# range and indicator specs.
+indicator_cache = TTLCache(
+    "finance_indicators", maxsize=INDICATOR_CACHE_SIZE, ttl=INDICATOR_TTL_OPEN
+)
+
+
 class TickerNotFoundError(Exception):
     """Custom exception for when a ticker is not found by yfinance."""
     pass
@@ -36,6 +102,336 @@ class YFinanceError(Exception):
     pass
 
 
+def normalize_ticker(ticker: str) -> str:
+    """Normalizes a ticker symbol so equivalent requests share cache entries."""
+    return ticker.strip().upper()
+
+
+def is_us_market_active(now: Optional[datetime] = None) -> bool:
+    """Checks whether US exchanges are in pre, regular or after-hours trading."""
+    now = now or datetime.now(ZoneInfo("America/New_York"))
+    return now.weekday() < 5 and 4 <= now.hour < 20
+
+
+def quote_ttl(stock_info: Dict[str, Any]) -> float:
+    """Picks how long a quote can be cached based on its market state."""
+    if not stock_info:
+        return QUOTE_TTL_OPEN
+    market_state = stock_info.get("marketState")
+    if market_state:
+        active = market_state in ACTIVE_MARKET_STATES
+    else:
+        active = is_us_market_active()
+    return QUOTE_TTL_OPEN if active else QUOTE_TTL_CLOSED
+
+
+def get_quote_info(stock: yf.Ticker) -> Dict[str, Any]:
+    """
+    Returns the `.info` dict for a ticker through the quote cache.
+    Concurrent misses for the same symbol share a single upstream fetch.
+    The returned dict is shared between requests and must not be mutated.
+    """
+    return quote_cache.get_or_load(
+        normalize_ticker(stock.ticker), lambda: stock.info, ttl=quote_ttl
+    )
+
+
+def load_fast_quote_info(stock: yf.Ticker, fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """Reads the given fields from `fast_info` into an `.info`-shaped dict."""
+    fast_info = stock.fast_info
+    quote = {"symbol": normalize_ticker(stock.ticker)}
+    for field in fields:
+        try:
+            value = fast_info[FAST_INFO_MAPPING[field]]
+        except (KeyError, AttributeError):
+            # fast_info raises these for values Yahoo does not have. Transport
+            # errors propagate, so they are not mistaken for an empty quote.
+            value = None
+        quote[FIELD_MAPPING[field]] = None if pd.isna(value) else value
+    return quote
+
+
+def fast_quote_ttl(quote: Dict[str, Any]) -> float:
+    """
+    Picks how long a fast quote can be cached. One without a price is not
+    cached, as it may come from a failed lookup rather than a bad ticker.
+    """
+    return quote_ttl(quote) if has_market_price(quote) else 0
+
+
+def fast_quote_key(symbol: str, info_fields: List[str]) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Returns the fast quote cache key. The price is always included, as it
+    decides whether the ticker is valid.
+    """
+    return symbol, tuple(sorted(set(info_fields) | {"price"}))
+
+
+def get_fast_quote_info(stock: yf.Ticker, info_fields: List[str]) -> Dict[str, Any]:
+    """
+    Builds an `.info`-shaped dict for the given fields from `fast_info`,
+    so the rest of the service can treat it like the full quote.
+    """
+    key = fast_quote_key(normalize_ticker(stock.ticker), info_fields)
+    return fast_quote_cache.get_or_load(
+        key, lambda: load_fast_quote_info(stock, key[1]), ttl=fast_quote_ttl
+    )
+
+
+def get_quote(stock: yf.Ticker, info_fields: List[str]) -> Tuple[Dict[str, Any], str]:
+    """
+    Returns the quote dict for a ticker and the source it came from:
+    `fast_info` when it can serve every requested field, `info` otherwise.
+    """
+    # A full quote that is already cached costs nothing, so prefer it
+    cached_info = quote_cache.get(normalize_ticker(stock.ticker))
+    if cached_info is not None:
+        return cached_info, "info"
+    if all(field in FAST_INFO_MAPPING for field in info_fields):
+        return get_fast_quote_info(stock, info_fields), "fast_info"
+    return get_quote_info(stock), "info"
+
+
+def quote_prefetch_key(symbol: str, info_fields: List[str]) -> Hashable:
+    """
+    Returns the prefetch key of the quote `get_quote` reads for these fields:
+    the fast quote cache key when `fast_info` serves them all, the bare
+    symbol when they need `.info`.
+    """
+    if all(field in FAST_INFO_MAPPING for field in info_fields):
+        return fast_quote_key(symbol, info_fields)
+    return symbol
+
+
+def quote_remaining(key: Hashable) -> Optional[float]:
+    """Seconds until the quote for a prefetch key expires, None if not cached."""
+    if isinstance(key, tuple):
+        # `get_quote` serves fast quotes from a cached `.info` first
+        remaining = [
+            seconds for seconds in
+            (fast_quote_cache.remaining(key), quote_cache.remaining(key[0]))
+            if seconds is not None
+        ]
+        return max(remaining) if remaining else None
+    return quote_cache.remaining(key)
+
+
+def refresh_quote(key: Hashable) -> Dict[str, Any]:
+    """
+    Fetches the quote for a prefetch key into its cache, replacing any
+    cached copy. Fast quote keys only read `fast_info`.
+    """
+    if isinstance(key, tuple):
+        symbol, fields = key
+        quote = load_fast_quote_info(yf.Ticker(symbol), fields)
+        fast_quote_cache.set(key, quote, fast_quote_ttl(quote))
+        return quote
+    info = yf.Ticker(key).info
+    quote_cache.set(key, info, quote_ttl(info))
+    return info
+
+
+prefetcher.register("finance", PrefetchTarget(
+    remaining=quote_remaining,
+    refresh=lambda key: run_upstream("finance", refresh_quote, key),
+    lead=QUOTE_PREFETCH_LEAD,
+    hot_keys=PREFETCH_TICKERS
+))
+
+
+def has_market_price(stock_info: Dict[str, Any]) -> bool:
+    """A ticker is only considered valid if its info carries a market price."""
+    return bool(stock_info) and stock_info.get('regularMarketPrice') is not None
+
+
+def parse_requested_fields(fields: Optional[str]) -> List[str]:
+    """Splits the comma-separated `fields` parameter, defaulting to DEFAULT_FIELDS."""
+    if fields:
+        return [field.strip() for field in fields.split(",")]
+    return DEFAULT_FIELDS
+
+
+def select_fields(stock_info: Dict[str, Any], requested_fields: List[str]) -> Dict[str, Any]:
+    """Maps the requested user-facing fields to their values in a `.info` dict."""
+    selected = {}
+    for field in requested_fields:
+        yf_key = FIELD_MAPPING.get(field)
+        if yf_key and yf_key in stock_info and stock_info[yf_key] is not None:
+            selected[field] = stock_info[yf_key]
+        else:
+            selected[field] = None
+    return selected
+
+
+def history_to_records(hist_df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Converts a yfinance history frame into a list of JSON-friendly rows."""
+    frame = history_frame(hist_df)
+    if frame.empty:
+        return []
+    # Format date for consistent JSON output
+    frame["date"] = frame["date"].dt.strftime('%Y-%m-%d %H:%M:%S')
+    # NaN is not valid JSON, so missing values become null
+    if frame.isna().any().any():
+        frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict(orient="records")
+
+
+def format_history(hist_df: pd.DataFrame, history_format: str) -> Any:
+    """
+    Shapes a history frame for the requested output format. Streaming
+    formats get the frame itself, which the router serializes in chunks.
+    """
+    if history_format == "columnar":
+        return history_to_columns(history_frame(hist_df))
+    if history_format in STREAMING_FORMATS:
+        return history_frame(hist_df)
+    return history_to_records(hist_df)
+
+
+def fetch_history(
+    stock: yf.Ticker,
+    history_days: int,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    interval: str,
+    adjusted: bool,
+    warmup_bars: int = 0
+) -> pd.DataFrame:
+    """
+    Fetches the history frame for the endpoint's range parameters.
+    `warmup_bars` extends daily ranges backwards for indicator lookback.
+    """
+    # Daily bars are served from the local store, which only asks
+    # yfinance for the dates it does not hold yet.
+    if interval in STORABLE_INTERVALS:
+        range_start, range_end = resolve_history_range(
+            history_days, start_date, end_date
+        )
+        if warmup_bars:
+            range_start -= timedelta(days=sessions_to_days(warmup_bars))
+        hist_df = history_store.get_history(
+            stock, normalize_ticker(stock.ticker), range_start, range_end,
+            interval, adjusted
+        )
+        if not start_date:
+            # Like `period`, history_days means the last N sessions
+            hist_df = hist_df.tail(history_days + warmup_bars)
+        return hist_df
+    # Prioritize start/end date over history_days
+    if start_date:
+        return stock.history(
+            start=start_date, end=end_date,
+            interval=interval, auto_adjust=adjusted
+        )
+    return stock.history(
+        period=f"{history_days}d", interval=interval,
+        auto_adjust=adjusted
+    )
+
+
+def get_history_with_indicators(
+    stock: yf.Ticker,
+    specs: List[IndicatorSpec],
+    history_days: int,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    interval: str,
+    adjusted: bool
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Returns the history frame and its indicator frame, through the
+    indicator cache. For daily bars, extra bars before the range are
+    fetched so rolling windows are already filled at the first bar.
+    """
+    range_start = None
+    if interval in STORABLE_INTERVALS:
+        range_start, range_end = resolve_history_range(
+            history_days, start_date, end_date
+        )
+        range_key = (range_start, range_end, None if start_date else history_days)
+        ttl = INDICATOR_TTL_OPEN if range_end > today_utc() else INDICATOR_TTL_CLOSED
+    else:
+        range_key = (history_days, start_date, end_date)
+        ttl = INDICATOR_TTL_OPEN
+
+    def load():
+        hist_df = fetch_history(
+            stock, history_days, start_date, end_date, interval, adjusted,
+            warmup_bars=lookback_bars(specs) if range_start else 0
+        )
+        if hist_df.empty:
+            return hist_df, pd.DataFrame(index=hist_df.index)
+        ind_df = compute_indicators(hist_df, specs)
+        if range_start is not None:
+            if start_date:
+                keep = bar_dates(hist_df.index) >= pd.Timestamp(range_start)
+                hist_df, ind_df = hist_df[keep], ind_df[keep]
+            else:
+                hist_df, ind_df = hist_df.tail(history_days), ind_df.tail(history_days)
+        return hist_df, ind_df
+
+    key = (normalize_ticker(stock.ticker), interval, adjusted, range_key, tuple(specs))
+    # yfinance reports network errors as an empty frame, so those are not cached
+    return indicator_cache.get_or_load(
+        key, load, ttl=lambda frames: 0 if frames[0].empty else ttl
+    )
+
+
+# Names that select whole response sections rather than `.info` fields,
+# so that e.g. `fields=historical` returns bars without touching the quote.
+SECTION_FIELDS = {"historical", "indicators", "recommendations"}
+
+
+@dataclass
+class FetchPlan:
+    """The upstream fetches one finance request actually needs."""
+    requested_fields: List[str]
+    info_fields: List[str]
+    history: bool
+    history_reaches_today: bool
+    recommendations: bool
+
+    @property
+    def info(self) -> bool:
+        return bool(self.info_fields)
+
+
+def plan_fetches(
+    fields: Optional[str],
+    history_days: int,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    include_recommendations: bool,
+    history_format: str = "json"
+) -> FetchPlan:
+    """
+    Derives the fetch plan from the request parameters. `.info` is only
+    scraped when at least one requested field comes from it. Streamed
+    formats return nothing but the history table, so they fetch no quote
+    fields or recommendations at all.
+    """
+    streamed = history_format in STREAMING_FORMATS
+    requested_fields = [] if streamed else [
+        field for field in parse_requested_fields(fields)
+        if field not in SECTION_FIELDS
+    ]
+    history = bool(history_days > 0 or start_date)
+    try:
+        reaches_today = history and (
+            resolve_history_range(history_days, start_date, end_date)[1] > today_utc()
+        )
+    except ValueError:
+        # Malformed dates are reported by the history fetch itself
+        reaches_today = False
+    return FetchPlan(
+        requested_fields=requested_fields,
+        info_fields=[field for field in requested_fields if field in FIELD_MAPPING],
+        history=history,
+        history_reaches_today=reaches_today,
+        recommendations=include_recommendations and not streamed,
+    )
+
+
 def get_finance_data_service(
     ticker: str,
     fields: Optional[str],
@@ -44,98 +440,136 @@ def get_finance_data_service(
     end_date: Optional[str],
     interval: str,
     include_recommendations: bool,
-    adjusted: bool
+    adjusted: bool,
+    history_format: str = "json",
+    indicators: Optional[str] = None,
+    indicators_only: bool = False,
+    max_points: Optional[int] = None,
+    downsample: str = "lttb"
 ) -> Dict[str, Any]:
     """
     Main service to fetch all financial data for a given ticker.
-    It orchestrates calls to yfinance for different data types.
+    It plans the minimal set of yfinance calls for the request, and a single
+    history frame serves validation, previous close and the requested range
+    wherever possible.
     """
-    try:
-        stock = yf.Ticker(ticker)
-        stock_info = stock.info
-        # A ticker is considered invalid if it has no info object or no market price.
-        # This is a much stricter check to avoid tickers with no real data.
-        if not stock_info or 'regularMarketPrice' not in stock_info or stock_info['regularMarketPrice'] is None:
-            # We double-check history as a fallback for some assets.
-            if stock.history(period="1d").empty:
-                raise TickerNotFoundError(
-                    f"Ticker '{ticker}' not found or no valid market data available."
-                )
+    plan = plan_fetches(
+        fields, history_days, start_date, end_date, include_recommendations,
+        history_format
+    )
+    specs = parse_indicators(indicators) if indicators else []
+    if specs and not plan.history:
+        raise InvalidIndicatorError(
+            "Indicators require history_days or start_date."
+        )
 
-    except Exception as e:
-        # This can catch broader network issues or yfinance errors.
-        raise YFinanceError(f"Error initializing ticker '{ticker}': {e}")
-
-    response_data = {"ticker": stock_info.get('symbol', ticker.upper())}
+    symbol = normalize_ticker(ticker)
+    stock = yf.Ticker(symbol)
+    stock_info = {}
+    quote_source = None
+    if plan.info:
+        try:
+            stock_info, quote_source = get_quote(stock, plan.info_fields)
+        except Exception as e:
+            # This can catch broader network issues or yfinance errors.
+            raise YFinanceError(f"Error initializing ticker '{ticker}': {e}")
 
-    # Determine which fields to fetch from the .info object
-    if fields:
-        requested_fields = [field.strip() for field in fields.split(",")]
-    else:
-        requested_fields = DEFAULT_FIELDS
+    response_data = {"ticker": stock_info.get('symbol', symbol)}
 
     # Populate response with requested fields
-    for field in requested_fields:
-        yf_key = FIELD_MAPPING.get(field)
-        if yf_key and yf_key in stock_info and stock_info[yf_key] is not None:
-            response_data[field] = stock_info[yf_key]
-        else:
-            response_data[field] = None
+    response_data.update(select_fields(stock_info, plan.requested_fields))
 
-    # --- FIX: Ensure previous_close is available for change calculation ---
-    # If yfinance .info doesn't provide previousClose, fetch it from history
-    if "previous_close" in requested_fields and response_data.get("previous_close") is None:
+    # Fetch the requested history first, as it can also validate the
+    # ticker and supply the previous close.
+    hist_df = None
+    history_error = None
+    if plan.history:
+        # Non-streamed formats return indicators under their own key, and
+        # can leave out the bars themselves.
+        separate_indicators = bool(specs) and history_format not in STREAMING_FORMATS
+        history_key = "indicators" if separate_indicators and indicators_only else "historical"
         try:
-            hist = stock.history(period="2d")
-            if not hist.empty and len(hist) > 1:
-                # The second to last entry is the previous day's close
-                response_data["previous_close"] = hist['Close'].iloc[-2]
-        except Exception:
-            # If this fails, we still have None, which is handled by the frontend
-            pass
-    # --- END FIX ---
-
-    # Separately fetch historical data if requested
-    if history_days > 0 or start_date:
-        try:
-            # Prioritize start/end date over history_days
-            if start_date:
-                hist_df = stock.history(
-                    start=start_date, end=end_date,
-                    interval=interval, auto_adjust=adjusted
+            ind_df = None
+            if specs:
+                hist_df, ind_df = get_history_with_indicators(
+                    stock, specs, history_days, start_date, end_date,
+                    interval, adjusted
                 )
             else:
-                hist_df = stock.history(
-                    period=f"{history_days}d", interval=interval,
-                    auto_adjust=adjusted
+                hist_df = fetch_history(
+                    stock, history_days, start_date, end_date, interval, adjusted
                 )
 
-            if not hist_df.empty:
-                hist_df = hist_df.reset_index()
-                # Find the date column, which can have different names
-                date_col = next(
-                    (col for col in hist_df.columns if 'Date' in col), None
+            # Bars and indicators are shaped as one table so their rows stay
+            # aligned through downsampling.
+            table_df = hist_df if ind_df is None else hist_df.join(ind_df)
+            if max_points:
+                table_df = downsample_history(table_df, max_points, downsample)
+
+            if separate_indicators:
+                response_data["indicators"] = format_history(
+                    table_df[ind_df.columns], history_format
                 )
-                if date_col:
-                    # Format date for consistent JSON output
-                    hist_df[date_col] = hist_df[date_col].dt.strftime(
-                        '%Y-%m-%d %H:%M:%S'
+                if not indicators_only:
+                    response_data["historical"] = format_history(
+                        table_df[hist_df.columns], history_format
                     )
-                    response_data["historical"] = hist_df.rename(
-                        columns={date_col: "date"}
-                    ).to_dict(orient="records")
-                else:
-                    response_data["historical"] = []
             else:
-                response_data["historical"] = []
+                # Streamed formats carry one table, so indicators become columns
+                if specs and indicators_only:
+                    table_df = table_df[ind_df.columns]
+                response_data["historical"] = format_history(table_df, history_format)
         except Exception as e:
             # Don't fail the whole request if history fails, just report error
-            response_data["historical"] = {
-                "error": f"Could not fetch historical data: {e}"
-            }
+            history_error = f"Could not fetch historical data: {e}"
+            response_data[history_key] = {"error": history_error}
+
+    # A short recent-history frame, fetched at most once and only when the
+    # requested history cannot stand in for it.
+    recent_df = None
+
+    def recent_history() -> pd.DataFrame:
+        nonlocal recent_df
+        if recent_df is None:
+            recent_df = stock.history(period="5d")
+        return recent_df
+
+    # A ticker is considered invalid if it has no market price in its info,
+    # and no bars in either the requested or the recent history.
+    if not has_market_price(stock_info) and (hist_df is None or hist_df.empty):
+        if not plan.info and history_error:
+            raise YFinanceError(f"Error fetching ticker '{ticker}': {history_error}")
+        # A short range can be empty for a valid ticker over a weekend or
+        # holiday, so only the recent sessions decide
+        try:
+            missing = recent_history().empty
+        except Exception as e:
+            raise YFinanceError(f"Error initializing ticker '{ticker}': {e}")
+        if missing:
+            raise TickerNotFoundError(
+                f"Ticker '{ticker}' not found or no valid market data available."
+            )
+
+    # If yfinance .info doesn't provide previousClose, take it from history.
+    # Daily bars that run up to today already hold it.
+    if "previous_close" in plan.requested_fields and response_data.get("previous_close") is None:
+        try:
+            if (
+                interval == "1d" and plan.history_reaches_today
+                and hist_df is not None and len(hist_df) > 1
+            ):
+                hist = hist_df
+            else:
+                hist = recent_history()
+            if not hist.empty and len(hist) > 1:
+                # The second to last entry is the previous day's close
+                response_data["previous_close"] = hist['Close'].iloc[-2]
+        except Exception:
+            # If this fails, we still have None, which is handled by the frontend
+            pass
 
     # Separately fetch recommendations if requested
-    if include_recommendations:
+    if plan.recommendations:
         try:
             recs_df = stock.recommendations
             if recs_df is not None and not recs_df.empty:
@@ -160,4 +594,174 @@ def get_finance_data_service(
                 "error": f"Could not fetch recommendations: {e}"
             }
 
+    if quote_source:
+        response_data["metadata"] = {"quote_source": quote_source}
+
     return response_data
+
+
+def get_indicators_service(
+    ticker: str,
+    indicators: str,
+    history_days: int,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    interval: str,
+    adjusted: bool,
+    history_format: str = "json"
+) -> Dict[str, Any]:
+    """
+    Computes technical indicators for a ticker without fetching its quote,
+    returning only the indicator series.
+    """
+    specs = parse_indicators(indicators)
+    if not (history_days > 0 or start_date):
+        raise InvalidIndicatorError(
+            "Indicators require history_days or start_date."
+        )
+
+    symbol = normalize_ticker(ticker)
+    try:
+        _, ind_df = get_history_with_indicators(
+            yf.Ticker(symbol), specs, history_days, start_date, end_date,
+            interval, adjusted
+        )
+    except Exception as e:
+        raise YFinanceError(f"Could not fetch historical data for '{ticker}': {e}")
+
+    if ind_df.empty:
+        raise TickerNotFoundError(
+            f"Ticker '{ticker}' not found or no historical data available."
+        )
+    return {"ticker": symbol, "indicators": format_history(ind_df, history_format)}
+
+
+def _download_history(
+    symbols: List[str],
+    history_days: int,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    interval: str,
+    adjusted: bool
+) -> Dict[str, pd.DataFrame]:
+    """
+    Fetches history for several tickers with one bulk `yf.download` call
+    and splits the result into one frame per ticker.
+    """
+    # Prioritize start/end date over history_days, as the single endpoint does
+    if start_date:
+        range_kwargs = {"start": start_date, "end": end_date}
+    else:
+        range_kwargs = {"period": f"{history_days}d"}
+
+    data = yf.download(
+        symbols, interval=interval, auto_adjust=adjusted,
+        group_by="ticker", threads=True, progress=False, **range_kwargs
+    )
+
+    frames = {}
+    if data is None or data.empty:
+        return frames
+    for symbol in symbols:
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            frame = data[symbol]
+        else:
+            frame = data
+        # Rows for dates where only other tickers traded are all NaN
+        frames[symbol] = frame.dropna(how="all")
+    return frames
+
+
+def get_batch_finance_data_service(
+    tickers: List[str],
+    fields: Optional[str],
+    history_days: int,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    interval: str,
+    adjusted: bool
+) -> Dict[str, Any]:
+    """
+    Fetches quotes, and optionally history, for several tickers at once.
+
+    `.info` lookups run concurrently through the quote cache and history is
+    fetched with a single bulk download. A failing ticker is reported under
+    `errors` without failing the rest of the batch.
+    """
+    symbols = list(dict.fromkeys(
+        normalize_ticker(ticker) for ticker in tickers if ticker.strip()
+    ))
+    if not symbols:
+        raise ValueError("At least one ticker must be provided.")
+    if len(symbols) > MAX_BATCH_TICKERS:
+        raise ValueError(
+            f"A batch can contain at most {MAX_BATCH_TICKERS} tickers."
+        )
+
+    requested_fields = parse_requested_fields(fields)
+    info_fields = [field for field in requested_fields if field in FIELD_MAPPING]
+    include_history = history_days > 0 or start_date
+    # Only daily bars up to today end with the previous session's close
+    history_has_previous_close = interval == "1d" and plan_fetches(
+        fields, history_days, start_date, end_date, False
+    ).history_reaches_today
+
+    calls = [(get_quote, (yf.Ticker(symbol), info_fields), {}) for symbol in symbols]
+    if include_history:
+        calls.append((
+            _download_history,
+            (symbols, history_days, start_date, end_date, interval, adjusted),
+            {}
+        ))
+    futures = submit_all("finance_batch", calls)
+    info_futures = dict(zip(symbols, futures))
+    history_future = futures[-1] if include_history else None
+
+    history_frames = {}
+    history_error = None
+    if history_future is not None:
+        try:
+            history_frames = history_future.result()
+        except Exception as e:
+            history_error = f"Could not fetch historical data: {e}"
+
+    results = {}
+    errors = {}
+    for symbol, future in info_futures.items():
+        try:
+            stock_info, quote_source = future.result()
+        except Exception as e:
+            errors[symbol] = f"Error initializing ticker '{symbol}': {e}"
+            continue
+
+        hist_df = history_frames.get(symbol)
+        if not has_market_price(stock_info) and (hist_df is None or hist_df.empty):
+            errors[symbol] = (
+                f"Ticker '{symbol}' not found or no valid market data available."
+            )
+            continue
+
+        response_data = {"ticker": stock_info.get('symbol', symbol)}
+        response_data.update(select_fields(stock_info, requested_fields))
+
+        # Fall back to the bulk history for a missing previous close
+        if (
+            "previous_close" in requested_fields
+            and response_data.get("previous_close") is None
+            and history_has_previous_close
+            and hist_df is not None and len(hist_df) > 1
+        ):
+            response_data["previous_close"] = hist_df['Close'].iloc[-2]
+
+        if include_history:
+            if history_error:
+                response_data["historical"] = {"error": history_error}
+            else:
+                response_data["historical"] = history_to_records(hist_df)
+
+        response_data["metadata"] = {"quote_source": quote_source}
+        results[symbol] = response_data
+
+    return {"results": results, "errors": errors}
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Iterable, List, Set
+
+import yfinance as yf
+
+from app.executor import run_upstream
+from .services import FIELD_MAPPING, fast_quote_cache, fast_quote_key, \
+    load_fast_quote_info, normalize_ticker, quote_ttl
+
+
+# Seconds between upstream polls of each subscribed ticker.
+STREAM_POLL_INTERVAL = float(os.environ.get("SWIPE_STREAM_POLL_INTERVAL", "5"))
+
+# Fields pushed to subscribers. They are all served by `fast_info`.
+STREAM_FIELDS = ["price", "previous_close", "open", "volume"]
+
+# Upper bound on tickers one client can subscribe to.
+MAX_STREAM_TICKERS = 50
+
+# Updates buffered per client. A client that falls further behind loses its
+# oldest updates rather than holding memory for the whole backlog.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def fetch_stream_quote(symbol: str) -> Dict[str, Any]:
+    """
+    Fetches a fresh quote for the stream and refreshes the fast quote cache
+    with it, so REST requests benefit from the poll too.
+    """
+    key = fast_quote_key(symbol, STREAM_FIELDS)
+    quote = load_fast_quote_info(yf.Ticker(symbol), key[1])
+    fast_quote_cache.set(key, quote, quote_ttl(quote))
+    return {field: quote.get(FIELD_MAPPING[field]) for field in STREAM_FIELDS}
+
+
+def parse_stream_tickers(tickers: Iterable[str]) -> List[str]:
+    """Normalizes and de-duplicates requested tickers, enforcing the limit."""
+    symbols = list(dict.fromkeys(
+        normalize_ticker(ticker) for ticker in tickers if ticker.strip()
+    ))
+    if not symbols:
+        raise ValueError("At least one ticker must be provided.")
+    if len(symbols) > MAX_STREAM_TICKERS:
+        raise ValueError(
+            f"A stream can follow at most {MAX_STREAM_TICKERS} tickers."
+        )
+    return symbols
+
+
+class QuoteHub:
+    """
+    Fans quote updates out to streaming clients.
+
+    Each ticker with at least one subscriber gets a single background
+    poller, so upstream calls scale with the number of distinct tickers
+    rather than the number of clients. Only fields whose values changed
+    since the previous poll are pushed.
+    """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._pollers: Dict[str, asyncio.Task] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+
+    def subscribe(self, queue: asyncio.Queue, symbols: List[str]):
+        """Adds a client queue to the given tickers and sends their snapshots."""
+        for symbol in symbols:
+            self._subscribers.setdefault(symbol, set()).add(queue)
+            if symbol in self._latest:
+                self._push(queue, {"ticker": symbol, **self._latest[symbol]})
+            if symbol not in self._pollers:
+                self._pollers[symbol] = asyncio.create_task(self._poll(symbol))
+
+    def unsubscribe(self, queue: asyncio.Queue, symbols: Iterable[str]):
+        """Removes a client queue, stopping pollers nobody listens to anymore."""
+        for symbol in list(symbols):
+            subscribers = self._subscribers.get(symbol)
+            if subscribers is None:
+                continue
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[symbol]
+                self._latest.pop(symbol, None)
+                poller = self._pollers.pop(symbol, None)
+                if poller:
+                    poller.cancel()
+
+    @staticmethod
+    def _push(queue: asyncio.Queue, update: Dict[str, Any]):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(update)
+
+    def _broadcast(self, symbol: str, update: Dict[str, Any]):
+        for queue in self._subscribers.get(symbol, ()):
+            self._push(queue, update)
+
+    async def _poll(self, symbol: str):
+        last_error = None
+        while True:
+            try:
+                quote = await run_upstream("finance", fetch_stream_quote, symbol)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Report each distinct failure once, then keep retrying
+                if str(e) != last_error:
+                    last_error = str(e)
+                    self._broadcast(symbol, {
+                        "ticker": symbol, "error": f"Could not fetch quote: {e}"
+                    })
+            else:
+                last_error = None
+                previous = self._latest.get(symbol, {})
+                changed = {
+                    field: value for field, value in quote.items()
+                    if previous.get(field) != value
+                }
+                if changed:
+                    self._latest[symbol] = quote
+                    self._broadcast(symbol, {
+                        "ticker": symbol, "timestamp": int(time.time()), **changed
+                    })
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tickers": len(self._pollers),
+            "subscriptions": sum(len(s) for s in self._subscribers.values()),
+        }
+
+    def shutdown(self):
+        for poller in self._pollers.values():
+            poller.cancel()
+        self._pollers.clear()
+        self._subscribers.clear()
+        self._latest.clear()
+
+
+quote_hub = QuoteHub(STREAM_POLL_INTERVAL)
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,6 +10,29 @@ from app.finance.router import router as finance_router
 from app.search.router import router as search_router
 from app.news.router import router as news_router
 from app.limiter import limiter
+from app.executor import executor_stats, shutdown_executors
+from app.cache import cache_stats, flight_stats
+from app.finance.history_store import history_store
+from app.finance.streaming import quote_hub
+from app.search.backends import backend_health
+from app.news.sentiment import start_sentiment, shutdown_sentiment
+from app.news.rss import rss_client
+from app.news.index import news_index
+from app.prefetch import prefetcher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_sentiment()
+    prefetcher.start()
+    yield
+    # Stop the prefetcher and quote pollers, and release the worker pools
+    await prefetcher.shutdown()
+    quote_hub.shutdown()
+    shutdown_executors()
+    shutdown_sentiment()
+    await rss_client.aclose()
+
 
 # Disable default docs
 app = FastAPI(
@@ -16,7 +40,8 @@ app = FastAPI(
     description="A production-ready API hub for Finance, Search, and News.",
     version="1.0.0",
     docs_url=None,
-    redoc_url=None
+    redoc_url=None,
+    lifespan=lifespan
 )
 
 # Configure rate limiter
@@ -38,6 +63,21 @@ app.include_router(search_router, prefix="/search", tags=["Search"])
 app.include_router(news_router, prefix="/news", tags=["News"])
 
 
+@app.get("/stats", tags=["Root"])
+async def get_stats():
+    """Reports upstream worker pool load and cache effectiveness."""
+    return {
+        "executors": executor_stats(),
+        "caches": cache_stats(),
+        "single_flight": flight_stats(),
+        "history_store": history_store.stats(),
+        "quote_streams": quote_hub.stats(),
+        "search_backends": backend_health.stats(),
+        "news_index": news_index.stats(),
+        "prefetch": prefetcher.stats(),
+    }
+
+
 @app.get("/", response_class=HTMLResponse, tags=["Root"])
 @limiter.limit("100/minute")
 async def read_root_and_serve_docs(request: Request):
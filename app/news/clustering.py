@@ -0,0 +1,79 @@
+import re
+import zlib
+from typing import List, Optional
+
+import numpy as np
+
+
+# MinHash signature length, split into LSH bands of BAND_ROWS rows. Two
+# entries whose token sets have a Jaccard similarity of about
+# (1 / LSH_BANDS) ** (1 / BAND_ROWS) = 0.5 or more are likely to share a
+# band and be grouped together.
+NUM_PERMUTATIONS = 64
+BAND_ROWS = 4
+LSH_BANDS = NUM_PERMUTATIONS // BAND_ROWS
+
+# A prime above 2**32, for the universal hash family (a * x + b) mod p.
+_PRIME = np.uint64(4294967311)
+_rng = np.random.default_rng(20240101)
+_A = _rng.integers(1, 2 ** 32, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 2 ** 32, NUM_PERMUTATIONS, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def tokens(text: str) -> List[str]:
+    """The words and word pairs of a text, lowercased."""
+    words = _WORD_RE.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def minhash(text: str) -> Optional[np.ndarray]:
+    """The MinHash signature of a text's tokens, or None if it has none."""
+    token_list = tokens(text)
+    if not token_list:
+        return None
+    hashes = np.fromiter(
+        (zlib.crc32(token.encode()) for token in set(token_list)),
+        dtype=np.uint64
+    )
+    # One row per token and one column per permutation; products stay
+    # below 2**64 because both factors are below 2**32
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def cluster_texts(texts: List[str]) -> List[List[int]]:
+    """
+    Groups texts that tell the same story, using MinHash signatures and
+    locality-sensitive hashing. Runs in time linear in the number of texts:
+    each text is hashed once and looked up in one bucket per band.
+
+    Returns groups of indices into `texts`. Groups are ordered by their
+    first index, and indices within a group are ascending.
+    """
+    parent = list(range(len(texts)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets = [{} for _ in range(LSH_BANDS)]
+    for i, text in enumerate(texts):
+        signature = minhash(text)
+        if signature is None:
+            continue
+        for band in range(LSH_BANDS):
+            key = signature[band * BAND_ROWS:(band + 1) * BAND_ROWS].tobytes()
+            first = buckets[band].setdefault(key, i)
+            if first != i:
+                root_a, root_b = find(first), find(i)
+                if root_a != root_b:
+                    # Keep the earliest entry as the root of a group
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    groups = {}
+    for i in range(len(texts)):
+        groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
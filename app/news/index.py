@@ -0,0 +1,189 @@
+import heapq
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Articles kept in the index, and how long (seconds) each is kept after it
+# was last seen in a feed. The oldest articles are dropped first.
+NEWS_INDEX_SIZE = 20000
+NEWS_INDEX_TTL = 24 * 60 * 60
+
+# BM25 term frequency saturation and document length normalization.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w{2,}")
+
+
+def index_terms(text: str) -> List[str]:
+    """The lowercased words of a text, as indexed and queried."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+@dataclass
+class IndexedArticle:
+    """An article held by the index, with what ranking and filters need."""
+    article: Dict[str, Any]
+    # Publication time as a Unix timestamp, None when the feed had no date
+    published_at: Optional[int]
+    terms: Dict[str, int]
+    length: int
+    expires_at: float
+
+
+class NewsIndex:
+    """
+    An in-memory inverted index over the articles of recently fetched feeds.
+
+    Each article is indexed once per URL on its title, description and
+    source; seeing it again in another feed only extends its retention.
+    Queries rank matches with BM25, and the index is bounded both by
+    article count and by age.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # URL -> article, oldest first
+        self._articles: "OrderedDict[str, IndexedArticle]" = OrderedDict()
+        # Term -> URL -> term frequency
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+        self.searches = 0
+
+    def _remove(self, url: str):
+        """Drops an article and its postings. Caller must hold the lock."""
+        doc = self._articles.pop(url)
+        self._total_length -= doc.length
+        for term in doc.terms:
+            postings = self._postings[term]
+            del postings[url]
+            if not postings:
+                del self._postings[term]
+
+    def _expire(self, now: float):
+        """Drops expired articles, oldest first. Caller must hold the lock."""
+        while self._articles:
+            url, doc = next(iter(self._articles.items()))
+            if doc.expires_at > now:
+                break
+            self._remove(url)
+
+    def add(self, articles: List[Tuple[Dict[str, Any], Optional[int]]]):
+        """Indexes (article, published_at) pairs, keyed by article URL."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            for article, published_at in articles:
+                url = article.get("url")
+                if not url:
+                    continue
+                doc = self._articles.get(url)
+                if doc is not None:
+                    doc.expires_at = now + self.ttl
+                    if article.get("sentiment") is not None:
+                        doc.article["sentiment"] = article["sentiment"]
+                    self._articles.move_to_end(url)
+                    continue
+
+                words = index_terms(" ".join(
+                    article.get(field) or ""
+                    for field in ("title", "description", "source")
+                ))
+                terms: Dict[str, int] = {}
+                for word in words:
+                    terms[word] = terms.get(word, 0) + 1
+                self._articles[url] = IndexedArticle(
+                    article=dict(article),
+                    published_at=published_at,
+                    terms=terms,
+                    length=len(words),
+                    expires_at=now + self.ttl
+                )
+                self._total_length += len(words)
+                for term, count in terms.items():
+                    self._postings.setdefault(term, {})[url] = count
+
+            while len(self._articles) > self.maxsize:
+                self._remove(next(iter(self._articles)))
+
+    def search(
+        self,
+        query: Optional[str],
+        start: int,
+        num_results: int,
+        from_ts: Optional[int] = None,
+        to_ts: Optional[int] = None,
+        language: Optional[str] = None,
+        region: Optional[str] = None
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Returns the number of matches and one page of matching articles,
+        best BM25 score first. Without query terms every article passing
+        the filters matches, newest first. `to_ts` is exclusive.
+        """
+        terms = list(dict.fromkeys(index_terms(query or "")))
+        with self._lock:
+            self._expire(time.monotonic())
+            self.searches += 1
+
+            def accepted(doc: IndexedArticle) -> bool:
+                if from_ts is not None or to_ts is not None:
+                    if doc.published_at is None:
+                        return False
+                    if from_ts is not None and doc.published_at < from_ts:
+                        return False
+                    if to_ts is not None and doc.published_at >= to_ts:
+                        return False
+                if language and doc.article.get("language") != language:
+                    return False
+                if region and doc.article.get("region") != region:
+                    return False
+                return True
+
+            scores: Dict[str, float] = {}
+            if terms:
+                count = len(self._articles)
+                average_length = self._total_length / count if count else 0.0
+                for term in terms:
+                    postings = self._postings.get(term)
+                    if not postings:
+                        continue
+                    idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for url, frequency in postings.items():
+                        doc = self._articles[url]
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc.length / (average_length or 1))
+                        scores[url] = scores.get(url, 0.0) + (
+                            idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                        )
+                matches = [
+                    (score, self._articles[url].published_at or 0, url)
+                    for url, score in scores.items() if accepted(self._articles[url])
+                ]
+            else:
+                matches = [
+                    (0.0, doc.published_at or 0, url)
+                    for url, doc in self._articles.items() if accepted(doc)
+                ]
+
+            # Only the requested page is ordered, not every match
+            page = heapq.nlargest(start + num_results, matches)[start:]
+            articles = [dict(self._articles[url].article) for _, _, url in page]
+        return len(matches), articles
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "articles": len(self._articles),
+                "terms": len(self._postings),
+                "searches": self.searches,
+            }
+
+
+news_index = NewsIndex(NEWS_INDEX_SIZE, NEWS_INDEX_TTL)
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import List, Dict, Any, Optional
 from .services import get_news_service, InvalidDateFormatError, \
-    NewsFetchingError
+    NewsFetchingError, resolve_feed_key, get_feed_async, InvalidCursorError, \
+    decode_since, entries_since, InvalidSourceError, NEWS_SOURCES, search_local_news, \
+    InvalidQueryError, get_sentiment_service, sentiment_query, validate_interval
 from app.limiter import limiter
+from app.executor import run_upstream, UpstreamBusyError
+from app.prefetch import prefetcher
 
 router = APIRouter()
 
@@ -46,6 +50,22 @@ async def get_news(
     include_sentiment: bool = Query(
         False,
         description="Set to true to perform sentiment analysis on the title and description."
+    ),
+    cluster: bool = Query(
+        False,
+        description="Set to true to group syndicated copies of the same story. "
+                    "Each article then lists the other copies under `related`."
+    ),
+    since: Optional[str] = Query(
+        None,
+        description="Only return articles published after this point: the "
+                    "`next_cursor` of a previous response, a Unix timestamp or "
+                    "an ISO 8601 date and time. Answers 304 when nothing is new."
+    ),
+    source: str = Query(
+        "google",
+        description="Where to read articles from: 'google' for Google News, or "
+                    "'local' to search recently fetched articles without an upstream call."
     )
 ):
     """
@@ -55,7 +75,48 @@ async def get_news(
     or leave it empty to get the current top headlines.
     """
     try:
-        articles = get_news_service(
+        if source not in NEWS_SOURCES:
+            raise InvalidSourceError(
+                f"Invalid source '{source}'. Use one of: {', '.join(NEWS_SOURCES)}."
+            )
+        if source == "local":
+            if cluster or since:
+                raise InvalidSourceError(
+                    "'cluster' and 'since' are not supported with source=local."
+                )
+            # The index lookup is quick, but scoring unscored articles is
+            # not, so the search runs on the news pool like the rest
+            return await run_upstream(
+                "news",
+                search_local_news,
+                q=q,
+                num_results=num_results,
+                start=start,
+                from_date=from_date,
+                to_date=to_date,
+                language=language,
+                region=region,
+                category=category,
+                include_sentiment=include_sentiment
+            )
+
+        # The feed is fetched on the event loop by the async RSS client;
+        # only slicing and scoring run on the news pool
+        key = resolve_feed_key(q, from_date, to_date, language, region, category)
+        if not (q or from_date or to_date):
+            # Headline and category feeds are kept warm when popular
+            prefetcher.record("news", key)
+        cursor = decode_since(since) if since else None
+        # Clustering needs the whole feed to find every copy of a story, and
+        # new entries can turn up anywhere in it
+        whole_feed = cluster or cursor is not None
+        feed = await get_feed_async(key, None if whole_feed else start + num_results)
+        if cursor is not None and not entries_since(feed, cursor):
+            # Nothing new: the client keeps polling with the same cursor
+            return Response(status_code=304)
+        articles = await run_upstream(
+            "news",
+            get_news_service,
             q=q,
             num_results=num_results,
             start=start,
@@ -64,13 +125,90 @@ async def get_news(
             language=language,
             region=region,
             category=category,
-            include_sentiment=include_sentiment
+            include_sentiment=include_sentiment,
+            feed=feed,
+            cluster=cluster,
+            since=since
         )
         return articles
     except InvalidDateFormatError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except InvalidSourceError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except NewsFetchingError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except UpstreamBusyError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"An unexpected error occurred: {e}"
+        )
+
+
+@router.get("/sentiment", response_model=Dict[str, Any])
+@limiter.limit("60/minute")
+async def get_news_sentiment(
+    request: Request,
+    q: Optional[str] = Query(
+        None,
+        description="A search query for the news to analyse. "
+                    "If both `q` and `ticker` are empty, the top headlines are used."
+    ),
+    ticker: Optional[str] = Query(
+        None, description="A stock ticker whose news to analyse (e.g., 'AAPL')."
+    ),
+    interval: str = Query(
+        "day", description="The bucket size of the time series: 'hour' or 'day'."
+    ),
+    from_date: Optional[str] = Query(
+        None, description="The start date for articles (YYYY-MM-DD)."
+    ),
+    to_date: Optional[str] = Query(
+        None, description="The end date for articles (YYYY-MM-DD)."
+    ),
+    language: str = Query(
+        "en", description="The language of the news articles (e.g., 'en', 'de')."
+    ),
+    region: str = Query(
+        "US", description="The region for the news (e.g., 'US', 'GB', 'IN')."
+    ),
+    category: Optional[str] = Query(
+        None, description="A topic to filter by (e.g., 'business', 'technology')."
+    )
+):
+    """
+    Aggregates the VADER sentiment of the news for a query or ticker into
+    hourly or daily buckets, with the mean and percentiles of each score.
+    """
+    try:
+        query = sentiment_query(q, ticker)
+        validate_interval(interval)
+        key = resolve_feed_key(query, from_date, to_date, language, region, category)
+        feed = await get_feed_async(key, None)
+        return await run_upstream(
+            "news",
+            get_sentiment_service,
+            query=query,
+            interval=interval,
+            language=language,
+            region=region,
+            category=category,
+            from_date=from_date,
+            to_date=to_date,
+            feed=feed
+        )
+    except (InvalidDateFormatError, InvalidQueryError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except NewsFetchingError as e:
         raise HTTPException(status_code=503, detail=str(e))
+    except UpstreamBusyError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
@@ -0,0 +1,146 @@
+import asyncio
+import urllib.parse
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+
+RSS_BASE_URL = "https://news.google.com/rss"
+
+# Seconds allowed for a feed request, and the size of the shared pool of
+# connections to Google News.
+RSS_TIMEOUT = 10.0
+RSS_MAX_CONNECTIONS = 20
+RSS_MAX_KEEPALIVE = 10
+
+
+@dataclass
+class RSSResult:
+    """The outcome of one feed request."""
+    entries: List[Dict[str, Any]] = field(default_factory=list)
+    # False when entries past the entry limit were skipped
+    complete: bool = True
+    # Items in the whole feed, including those past the entry limit
+    total: int = 0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # True when the server answered 304 to a conditional request
+    not_modified: bool = False
+
+
+def feed_url(
+    search_query: Optional[str],
+    language: str,
+    region: str,
+    from_date: Optional[str],
+    to_date: Optional[str]
+) -> str:
+    """
+    Builds the Google News RSS URL for a search, or for the top headlines
+    when there is no search query. Matches the URLs pygooglenews requests.
+    """
+    ceid = f"ceid={region}:{language}&hl={language}&gl={region}"
+    if search_query is None:
+        return f"{RSS_BASE_URL}?{ceid}"
+    if from_date:
+        search_query += f" after:{from_date}"
+    if to_date:
+        search_query += f" before:{to_date}"
+    return f"{RSS_BASE_URL}/search?q={urllib.parse.quote_plus(search_query)}&{ceid}"
+
+
+def _entry(item: ET.Element) -> Dict[str, Any]:
+    """Converts an RSS <item> into the entry shape pygooglenews produces."""
+    source = item.find("source")
+    return {
+        "title": item.findtext("title"),
+        "link": item.findtext("link"),
+        "published": item.findtext("pubDate"),
+        "summary": item.findtext("description") or "",
+        "source": (
+            {"title": source.text, "href": source.get("url")}
+            if source is not None else {}
+        ),
+    }
+
+
+class GoogleNewsRSS:
+    """
+    An async client for the Google News RSS endpoints.
+
+    Requests share one pooled HTTP client. Feeds are parsed incrementally
+    as the body arrives, and items past the entry limit are only counted,
+    never converted into entries. ETag and Last-Modified
+    validators turn refreshes of an unchanged feed into a 304.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # A client is tied to the event loop it was first used on
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=RSS_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=RSS_MAX_CONNECTIONS,
+                    max_keepalive_connections=RSS_MAX_KEEPALIVE
+                )
+            )
+            self._loop = loop
+        return self._client
+
+    async def fetch(
+        self,
+        url: str,
+        limit: Optional[int] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> RSSResult:
+        """
+        Fetches and parses a feed, reading at most `limit` entries while
+        counting every item in `total`. Raises on HTTP errors and malformed
+        XML.
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        async with self._get_client().stream("GET", url, headers=headers) as response:
+            if response.status_code == 304:
+                return RSSResult(etag=etag, last_modified=last_modified, not_modified=True)
+            response.raise_for_status()
+
+            result = RSSResult(
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+            parser = ET.XMLPullParser(events=("end",))
+            async for chunk in response.aiter_bytes():
+                parser.feed(chunk)
+                for _, element in parser.read_events():
+                    if element.tag != "item":
+                        continue
+                    result.total += 1
+                    if limit and len(result.entries) >= limit:
+                        result.complete = False
+                    else:
+                        result.entries.append(_entry(element))
+                    element.clear()
+            parser.close()
+            return result
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+rss_client = GoogleNewsRSS()
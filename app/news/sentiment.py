@@ -0,0 +1,233 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from app.cache import TTLCache
+from app.executor import get_pool, UpstreamBusyError
+
+# Initialize VADER once at the module level to avoid re-creation on each call.
+sia = SentimentIntensityAnalyzer()
+
+# Scores are memoized by a hash of the scored text. The same text always
+# scores the same, so entries only leave the memo to bound its size.
+SENTIMENT_MEMO_SIZE = 50000
+SENTIMENT_MEMO_TTL = 24 * 60 * 60
+
+# Unscored texts in one call at or above which scoring moves to the process
+# pool, and how many texts each worker task scores.
+PROCESS_POOL_THRESHOLD = 40
+PROCESS_CHUNK_SIZE = 20
+
+# Worker processes for batch scoring. Zero scores everything in-thread.
+SENTIMENT_PROCESSES = int(
+    os.environ.get("SWIPE_SENTIMENT_PROCESSES", min(2, os.cpu_count() or 1))
+)
+
+# Whether newly fetched feeds are scored in the background ahead of demand.
+PRECOMPUTE_SENTIMENT = os.environ.get("SWIPE_SENTIMENT_PRECOMPUTE", "1") != "0"
+
+sentiment_memo = TTLCache("sentiment_scores", SENTIMENT_MEMO_SIZE, SENTIMENT_MEMO_TTL)
+
+logger = logging.getLogger(__name__)
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+# Set once worker processes failed to start, after which scoring stays in-thread
+_process_pool_unavailable = False
+
+
+def article_text(title: Optional[str], description: str) -> str:
+    """The text an article is scored on."""
+    return f"{title}. {description}"
+
+
+def _text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def memoized_score(text: str) -> Optional[Dict[str, float]]:
+    """The memoized scores of a text, or None if it was not scored yet."""
+    return sentiment_memo.get(_text_key(text))
+
+
+def _score_chunk(texts: List[str]) -> List[Dict[str, float]]:
+    """Scores a list of texts. Runs in the worker processes too."""
+    return [sia.polarity_scores(text) for text in texts]
+
+
+def _disable_process_pool(error: Exception):
+    """Drops the process pool for good after it could not be started."""
+    global _process_pool, _process_pool_unavailable
+    with _process_pool_lock:
+        _process_pool_unavailable = True
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+    logger.warning("Sentiment worker processes unavailable, scoring in-thread: %s", error)
+
+
+def _get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Returns the scoring process pool, starting it on first use. Returns None
+    when scoring runs in-thread, including on hosts that cannot create the
+    pool's queues and locks.
+    """
+    global _process_pool
+    if SENTIMENT_PROCESSES <= 0 or _process_pool_unavailable:
+        return None
+    with _process_pool_lock:
+        if _process_pool is not None or _process_pool_unavailable:
+            return _process_pool
+        try:
+            # Spawned rather than forked, as the parent runs many threads
+            _process_pool = ProcessPoolExecutor(
+                max_workers=SENTIMENT_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            return _process_pool
+        except OSError as e:
+            error = e
+    _disable_process_pool(error)
+    return None
+
+
+def score_texts(texts: List[str]) -> List[Dict[str, float]]:
+    """
+    Returns the VADER scores of several texts, in order.
+
+    Texts scored before are read from the memo. The rest are scored in one
+    batch: in-thread when there are few, spread over the process pool in
+    chunks otherwise.
+    """
+    keys = [_text_key(text) for text in texts]
+    scores = [sentiment_memo.get(key) for key in keys]
+
+    missing = {}
+    for key, text, score in zip(keys, texts, scores):
+        if score is None:
+            missing.setdefault(key, text)
+
+    if missing:
+        pending = list(missing.items())
+        pool = _get_process_pool() if len(pending) >= PROCESS_POOL_THRESHOLD else None
+        computed = None
+        if pool is not None:
+            chunks = [
+                [text for _, text in pending[i:i + PROCESS_CHUNK_SIZE]]
+                for i in range(0, len(pending), PROCESS_CHUNK_SIZE)
+            ]
+            try:
+                computed = [score for chunk in pool.map(_score_chunk, chunks) for score in chunk]
+            except (OSError, BrokenProcessPool):
+                # Platforms that cannot run worker processes score in-thread
+                computed = None
+        if computed is None:
+            computed = _score_chunk([text for _, text in pending])
+
+        fresh = {}
+        for (key, _), score in zip(pending, computed):
+            sentiment_memo.set(key, score)
+            fresh[key] = score
+        scores = [score if score is not None else fresh[key] for key, score in zip(keys, scores)]
+
+    return scores
+
+
+def precompute_sentiment(texts: List[str]):
+    """
+    Scores texts in the background so later sentiment requests hit the
+    memo. Skipped when disabled or when the sentiment pool is busy.
+    """
+    if not PRECOMPUTE_SENTIMENT or not texts:
+        return
+    try:
+        get_pool("sentiment").submit(score_texts, texts)
+    except UpstreamBusyError:
+        pass
+
+
+def start_sentiment():
+    """
+    Starts the scoring processes ahead of the first large batch, so no
+    request pays for spawning them. Called when the application starts.
+    """
+    pool = _get_process_pool()
+    if pool is None:
+        return
+    try:
+        for _ in range(SENTIMENT_PROCESSES):
+            pool.submit(_score_chunk, [])
+    except (OSError, BrokenProcessPool) as e:
+        _disable_process_pool(e)
+
+
+def shutdown_sentiment():
+    """Stops the scoring processes. Called when the application shuts down."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+
+
+# The VADER scores aggregated per bucket, and the percentiles reported.
+SCORE_FIELDS = ("compound", "pos", "neg", "neu")
+SCORE_PERCENTILES = (25, 50, 75)
+
+
+def aggregate_scores(
+    timestamps: List[int],
+    scores: List[Dict[str, float]],
+    width: int
+) -> List[Dict[str, Any]]:
+    """
+    Groups scores into buckets `width` seconds wide by timestamp and
+    returns, for each non-empty bucket in time order, the count plus the
+    mean and percentiles of every VADER score. All buckets are computed at
+    once with NumPy, without a Python loop over articles.
+    """
+    if not timestamps:
+        return []
+    values = np.array([[score[name] for name in SCORE_FIELDS] for score in scores], dtype=float)
+    buckets = np.asarray(timestamps, dtype=np.int64) // width * width
+
+    order = np.argsort(buckets, kind="stable")
+    starts, first, counts = np.unique(buckets[order], return_index=True, return_counts=True)
+    means = np.add.reduceat(values[order], first, axis=0) / counts[:, None]
+
+    # Percentiles with linear interpolation, as np.percentile computes them:
+    # sort each score within its bucket, then read between neighbouring ranks
+    ranks = first[:, None] + np.array(SCORE_PERCENTILES) / 100 * (counts - 1)[:, None]
+    lower = np.floor(ranks).astype(np.int64)
+    upper = np.ceil(ranks).astype(np.int64)
+    fraction = ranks - lower
+    percentiles = []
+    for column in range(len(SCORE_FIELDS)):
+        ordered = values[np.lexsort((values[:, column], buckets)), column]
+        percentiles.append(ordered[lower] + (ordered[upper] - ordered[lower]) * fraction)
+
+    return [
+        {
+            "start": int(start),
+            "count": int(count),
+            **{
+                name: {
+                    "mean": round(float(means[b, column]), 4),
+                    **{
+                        f"p{p}": round(float(percentiles[column][b, k]), 4)
+                        for k, p in enumerate(SCORE_PERCENTILES)
+                    },
+                }
+                for column, name in enumerate(SCORE_FIELDS)
+            },
+        }
+        for b, (start, count) in enumerate(zip(starts, counts))
+    ]
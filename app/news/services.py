@@ -1,12 +1,25 @@
 from pygooglenews import GoogleNews
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from dataclasses import dataclass, field, replace
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional, Set, Tuple
+from datetime import datetime, timezone
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
 import re
 import html
+import time
 
-# Initialize VADER once at the module level to avoid re-creation on each call.
-sia = SentimentIntensityAnalyzer()
+from app.cache import SingleFlight, TTLCache
+from app.executor import run_upstream
+from app.prefetch import prefetcher, PrefetchTarget
+from .clustering import cluster_texts
+from .index import news_index
+from .rss import feed_url, rss_client
+from .sentiment import aggregate_scores, article_text, memoized_score, \
+    precompute_sentiment, score_texts
 
 
 class NewsFetchingError(Exception):
@@ -19,6 +32,26 @@ class InvalidDateFormatError(Exception):
     pass
 
 
+class InvalidCursorError(Exception):
+    """Custom exception for `since` cursors that cannot be read."""
+    pass
+
+
+class InvalidSourceError(Exception):
+    """Custom exception for unknown or unsupported article sources."""
+    pass
+
+
+class InvalidQueryError(Exception):
+    """Custom exception for query parameters that cannot be used together."""
+    pass
+
+
+# Where articles can be read from: Google News, or the local index of
+# articles from recently fetched feeds.
+NEWS_SOURCES = ("google", "local")
+
+
 def clean_html(raw_html: str) -> str:
     """A simple utility to strip HTML tags from a string."""
     cleanr = re.compile('<.*?>')
@@ -26,6 +59,33 @@ def clean_html(raw_html: str) -> str:
     return html.unescape(cleantext)
 
 
+def strip_source(entry: Dict[str, Any]) -> str:
+    """The entry title without the ' - Outlet' suffix Google News adds."""
+    title = entry.get('title') or ''
+    source = (entry.get('source') or {}).get('title')
+    if source and title.endswith(f" - {source}"):
+        return title[:-len(source) - 3]
+    return title
+
+
+def parse_published(value: Optional[str]) -> Optional[int]:
+    """An entry's RFC 822 publication date as a Unix timestamp, if valid."""
+    if not value:
+        return None
+    try:
+        published = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return int(published.timestamp())
+
+
+def link_id(link: Optional[str]) -> str:
+    """A short, stable id for an entry link, used inside cursors."""
+    return hashlib.blake2b((link or "").encode(), digest_size=6).hexdigest()
+
+
 def validate_date_format(date_str: Optional[str]) -> Optional[str]:
     """Ensures that a date string is in the 'YYYY-MM-DD' format."""
     if date_str is None:
@@ -39,6 +99,442 @@ def validate_date_format(date_str: Optional[str]) -> Optional[str]:
         )
 
 
+# How long fetched feeds are served from memory (seconds). Headlines move
+# faster than the results of a search, so they are refreshed sooner.
+TOP_NEWS_TTL = 300
+SEARCH_NEWS_TTL = 900
+FEED_CACHE_SIZE = 256
+
+# Feeds are kept this long (seconds) after going stale, so their ETag and
+# Last-Modified validators can turn the refresh into a 304.
+FEED_RETAIN_TTL = 3600
+
+# The most requested headline and category feeds kept warm by the
+# prefetcher, and how many seconds before going stale they are refreshed.
+PREFETCH_FEEDS = 10
+FEED_PREFETCH_LEAD = 30
+
+# Entries parsed at least, even when a request needs fewer, so the next
+# pages of a feed are usually already in memory.
+PARSE_AHEAD_ENTRIES = 50
+
+
+@dataclass
+class NewsFeed:
+    """The parsed entries of one Google News feed and when they were fetched."""
+    entries: List[Dict[str, Any]]
+    fetched_at: datetime
+    # Monotonic time until which the feed is served without revalidation
+    fresh_until: float = 0.0
+    # False when only the first entries of the feed were parsed
+    complete: bool = True
+    # Entries in the whole feed, parsed or not
+    total: int = 0
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Story clusters as lists of entry indices, computed on first use
+    clusters: Optional[List[List[int]]] = field(default=None, repr=False)
+    # Entry publication times as Unix timestamps, parsed on first use
+    timestamps: Optional[List[Optional[int]]] = field(default=None, repr=False)
+    # Whether the entries were added to the local news index
+    indexed: bool = field(default=False, repr=False)
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.fresh_until
+
+    def covers(self, needed: Optional[int]) -> bool:
+        """
+        Whether the feed holds the first `needed` entries, or all of them.
+        A `needed` of None asks for the whole feed.
+        """
+        if needed is None:
+            return self.complete
+        return self.complete or len(self.entries) >= needed
+
+    def story_clusters(self) -> List[List[int]]:
+        """
+        Groups the entries that cover the same story. The result is kept
+        on the feed, so it is computed once per fetch.
+        """
+        if self.clusters is None:
+            self.clusters = cluster_texts([
+                f"{strip_source(entry)} {clean_html(entry.get('summary', ''))}"
+                for entry in self.entries
+            ])
+        return self.clusters
+
+    def published_times(self) -> List[Optional[int]]:
+        """The publication time of each entry, None where it is missing."""
+        if self.timestamps is None:
+            self.timestamps = [
+                parse_published(entry.get('published')) for entry in self.entries
+            ]
+        return self.timestamps
+
+
+# A `since` cursor: entries published after `timestamp`, plus those
+# published at exactly `timestamp` whose link id is not in `seen`. Entries
+# that share a second can then be split across two polls.
+SinceCursor = Tuple[int, Set[str]]
+
+
+def encode_since(timestamp: int, seen: Set[str]) -> str:
+    """Builds the opaque cursor returned as `next_cursor`."""
+    payload = json.dumps([timestamp, sorted(seen)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_since(since: str) -> SinceCursor:
+    """
+    Reads a `since` value: a cursor made by `encode_since`, a Unix
+    timestamp, or an ISO 8601 date and time (UTC unless it has an offset).
+    """
+    # Publication times have whole seconds, so "after t" starts at t + 1
+    since = since.strip()
+    if since.isdigit():
+        return int(since) + 1, set()
+    try:
+        moment = datetime.fromisoformat(since.replace("Z", "+00:00"))
+    except ValueError:
+        pass
+    else:
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return int(moment.timestamp()) + 1, set()
+    try:
+        padded = since + "=" * (-len(since) % 4)
+        timestamp, seen = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(timestamp, int) or not isinstance(seen, list):
+            raise ValueError
+        return timestamp, {str(item) for item in seen}
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursorError(
+            f"Invalid since value '{since}'. Use a cursor, a Unix timestamp "
+            "or an ISO 8601 date and time."
+        )
+
+
+def entries_since(feed: NewsFeed, cursor: Optional[SinceCursor]) -> List[int]:
+    """
+    Indices of the dated entries published after a cursor (all of them
+    without one), oldest first. Entries without a date are never included.
+    """
+    times = feed.published_times()
+    indices = [i for i, published in enumerate(times) if published is not None]
+    if cursor is not None:
+        timestamp, seen = cursor
+        indices = [
+            i for i in indices
+            if times[i] > timestamp
+            or (times[i] == timestamp and link_id(feed.entries[i].get('link')) not in seen)
+        ]
+    return sorted(indices, key=lambda i: times[i])
+
+
+def next_since(
+    feed: NewsFeed,
+    cursor: Optional[SinceCursor],
+    new: List[int],
+    returned: Set[int]
+) -> Optional[str]:
+    """
+    The cursor for the next poll after returning the entries `returned`
+    out of the `new` ones. It stops before the oldest new entry that was
+    not returned, so no entry is skipped by a later poll.
+    """
+    times = feed.published_times()
+    left_out = [times[i] for i in new if i not in returned]
+    if left_out:
+        timestamp = min(left_out)
+    elif new:
+        timestamp = times[new[-1]]
+    elif cursor is not None:
+        return encode_since(*cursor)
+    else:
+        return None
+    seen = {
+        link_id(feed.entries[i].get('link'))
+        for i in returned if times[i] == timestamp
+    }
+    if cursor is not None and cursor[0] == timestamp:
+        seen |= cursor[1]
+    return encode_since(timestamp, seen)
+
+
+def feed_key(
+    q: Optional[str],
+    language: str,
+    region: str,
+    category: Optional[str],
+    from_date: Optional[str],
+    to_date: Optional[str]
+) -> Tuple:
+    """The upstream parameters that identify a feed, normalized."""
+    return (
+        " ".join(q.split()) if q else None,
+        language.lower(),
+        region.upper(),
+        category,
+        from_date,
+        to_date,
+    )
+
+
+def feed_query(key: Tuple) -> Optional[str]:
+    """
+    The Google News search query for a feed key, or None when the key asks
+    for the top headlines.
+    """
+    q, _, _, category, from_date, to_date = key
+
+    # Determine if we need to use the search endpoint. Any filter requires it.
+    use_search = q or from_date or to_date or category
+    if not use_search:
+        return None
+
+    # If a date filter is applied without a query, we need a default query.
+    # We can use the category if provided, otherwise a generic "news" term.
+    search_query = q or category or "top stories"
+
+    # If both q and category are present, combine them.
+    if q and category:
+        search_query = f"{q} {category}"
+    return search_query
+
+
+def fetch_feed_entries(
+    q: Optional[str],
+    language: str,
+    region: str,
+    category: Optional[str],
+    from_date: Optional[str],
+    to_date: Optional[str]
+) -> List[Dict[str, Any]]:
+    """
+    Fetches the feed entries from Google News with pygooglenews: a search
+    when any filter is given, the top headlines otherwise.
+    """
+    gn = GoogleNews(lang=language, country=region)
+    search_result = None
+    search_query = feed_query((q, language, region, category, from_date, to_date))
+
+    if search_query is not None:
+        try:
+            search_result = gn.search(search_query, from_=from_date, to_=to_date)
+        except Exception as e:
+            raise NewsFetchingError(f"The underlying news library failed on search: {e}")
+    else:
+        # Only fetch top news if no filters are applied.
+        try:
+            search_result = gn.top_news()
+        except Exception as e:
+            raise NewsFetchingError(f"The underlying news library failed on top_news: {e}")
+
+    if not search_result:
+        raise NewsFetchingError("News service did not return a result.")
+
+    return search_result.get('entries', [])
+
+
+def feed_ttl(key: Tuple) -> float:
+    """How long a feed stays fresh: shorter for the top headlines."""
+    return TOP_NEWS_TTL if feed_query(key) is None else SEARCH_NEWS_TTL
+
+
+def new_feed(key: Tuple, entries: List[Dict[str, Any]], **kwargs) -> NewsFeed:
+    """
+    Wraps freshly fetched entries in a NewsFeed and queues them for
+    background sentiment scoring. `total` defaults to the entries given.
+    """
+    kwargs.setdefault("total", len(entries))
+    precompute_sentiment([
+        article_text(entry.get('title'), clean_html(entry.get('summary', '')))
+        for entry in entries
+    ])
+    return NewsFeed(
+        entries=entries,
+        fetched_at=datetime.utcnow(),
+        fresh_until=time.monotonic() + feed_ttl(key),
+        **kwargs
+    )
+
+
+def load_feed(key: Tuple) -> NewsFeed:
+    """Fetches the complete feed identified by a `feed_key` with pygooglenews."""
+    return new_feed(key, fetch_feed_entries(*key))
+
+
+# Parsed feeds, so paging through a feed or repeating a request reads from
+# memory. Stale feeds are kept a while longer for conditional refreshes.
+feed_cache = TTLCache("news_feeds", FEED_CACHE_SIZE, FEED_RETAIN_TTL)
+
+# Concurrent blocking loads of the same feed share one pygooglenews fetch.
+# Shared async refreshes are counted here too.
+news_flight = SingleFlight("news")
+
+
+def get_feed(key: Tuple) -> NewsFeed:
+    """Returns the complete feed for a key, from the cache when it is fresh."""
+    feed = feed_cache.get(key)
+    if feed is not None and feed.is_fresh() and feed.complete:
+        return feed
+
+    def load() -> NewsFeed:
+        feed = load_feed(key)
+        feed_cache.set(key, feed)
+        return feed
+
+    return news_flight.do(key, load)
+
+
+async def refresh_feed(key: Tuple, needed: Optional[int]) -> NewsFeed:
+    """
+    Fetches a feed with the async RSS client, reading only the entries
+    needed (but at least PARSE_AHEAD_ENTRIES; all of them when `needed` is
+    None). A complete cached copy is revalidated with its validators.
+    Falls back to pygooglenews on the news pool if the RSS request fails.
+    """
+    stale = feed_cache.get(key)
+    _, language, region, _, from_date, to_date = key
+    url = feed_url(feed_query(key), language, region, from_date, to_date)
+    conditional = stale is not None and stale.complete
+
+    try:
+        result = await rss_client.fetch(
+            url,
+            limit=max(needed, PARSE_AHEAD_ENTRIES) if needed is not None else None,
+            etag=stale.etag if conditional else None,
+            last_modified=stale.last_modified if conditional else None
+        )
+    except Exception:
+        feed = await run_upstream("news", load_feed, key)
+    else:
+        if result.not_modified:
+            feed = replace(stale, fresh_until=time.monotonic() + feed_ttl(key))
+        else:
+            feed = new_feed(
+                key, result.entries, complete=result.complete, total=result.total,
+                etag=result.etag, last_modified=result.last_modified
+            )
+    feed_cache.set(key, feed)
+    return feed
+
+
+# Feed refreshes in progress, so concurrent requests await the same one.
+_refreshes: Dict[Tuple, asyncio.Task] = {}
+
+
+def shared_refresh(key: Tuple, needed: Optional[int]) -> asyncio.Task:
+    """The refresh in progress for a feed, starting one if there is none."""
+    task = _refreshes.get(key)
+    news_flight.count(shared=task is not None)
+    if task is None:
+        task = asyncio.ensure_future(refresh_feed(key, needed))
+        _refreshes[key] = task
+        task.add_done_callback(lambda _: _refreshes.pop(key, None))
+    return task
+
+
+async def get_feed_async(key: Tuple, needed: Optional[int]) -> NewsFeed:
+    """
+    Returns a feed holding at least its first `needed` entries (the whole
+    feed when None), from the cache when possible. Runs on the event loop;
+    concurrent requests for the same feed share one refresh.
+    """
+    for _ in range(2):
+        feed = feed_cache.get(key)
+        if feed is not None and feed.is_fresh() and feed.covers(needed):
+            return feed
+
+        feed = await asyncio.shield(shared_refresh(key, needed))
+        if feed.covers(needed):
+            return feed
+        # The shared refresh read fewer entries than this request needs
+    return await refresh_feed(key, needed)
+
+
+def build_article(
+    entry: Dict[str, Any],
+    q: Optional[str],
+    language: str,
+    region: str,
+    category: Optional[str]
+) -> Dict[str, Any]:
+    """Normalizes a feed entry into the article shape the API returns."""
+    return {
+        "title": entry.get('title'),
+        "url": entry.get('link'),
+        "source": entry.get('source', {}).get('title'),
+        "published": entry.get('published'),
+        "description": clean_html(entry.get('summary', '')),
+        "image": None,
+        "category": category if q else "top",
+        "language": language,
+        "region": region,
+    }
+
+
+def index_feed(
+    feed: NewsFeed,
+    q: Optional[str],
+    language: str,
+    region: str,
+    category: Optional[str]
+):
+    """
+    Adds every entry of a feed to the local news index, once per fetch,
+    with its sentiment when it was scored already.
+    """
+    if feed.indexed:
+        return
+    feed.indexed = True
+    articles = []
+    for entry, published_at in zip(feed.entries, feed.published_times()):
+        article = build_article(entry, q, language.lower(), region.upper(), category)
+        article["sentiment"] = memoized_score(
+            article_text(article['title'], article['description'])
+        )
+        articles.append((article, published_at))
+    news_index.add(articles)
+
+
+def feed_remaining(key: Tuple) -> Optional[float]:
+    """Seconds until a cached feed goes stale, None if it is not fresh."""
+    feed = feed_cache.get(key)
+    if feed is None:
+        return None
+    left = feed.fresh_until - time.monotonic()
+    return left if left > 0 else None
+
+
+async def prefetch_feed(key: Tuple) -> NewsFeed:
+    """Refreshes a whole feed ahead of demand, sharing any refresh in progress."""
+    return await asyncio.shield(shared_refresh(key, None))
+
+
+prefetcher.register("news", PrefetchTarget(
+    remaining=feed_remaining,
+    refresh=prefetch_feed,
+    lead=FEED_PREFETCH_LEAD,
+    hot_keys=PREFETCH_FEEDS
+))
+
+
+def resolve_feed_key(
+    q: Optional[str],
+    from_date: Optional[str],
+    to_date: Optional[str],
+    language: str,
+    region: str,
+    category: Optional[str]
+) -> Tuple:
+    """Validates the request's dates and returns the key of its feed."""
+    return feed_key(
+        q, language, region, category,
+        validate_date_format(from_date), validate_date_format(to_date)
+    )
+
+
 def get_news_service(
     q: Optional[str],
     num_results: int,
@@ -48,77 +544,235 @@ def get_news_service(
     language: str,
     region: str,
     category: Optional[str],
-    include_sentiment: bool
+    include_sentiment: bool,
+    feed: Optional[NewsFeed] = None,
+    cluster: bool = False,
+    since: Optional[str] = None
 ) -> Dict[str, Any]:
     """
-    Main service to fetch news. It uses pygooglenews to either search for
-    a specific query or get the top headlines.
-    """
-    valid_from = validate_date_format(from_date)
-    valid_to = validate_date_format(to_date)
+    Main service to fetch news. It either searches for a specific query or
+    gets the top headlines. The router passes in the `feed` it fetched with
+    the async RSS client; without one the feed is loaded with pygooglenews.
 
-    try:
-        gn = GoogleNews(lang=language.lower(), country=region.upper())
-        search_result = None
-
-        # Determine if we need to use the search endpoint. Any filter requires it.
-        use_search = q or valid_from or valid_to or category
+    With `cluster`, syndicated copies of a story are grouped: pagination
+    runs over stories, and each article lists its other copies under
+    `related`.
 
-        if use_search:
-            # If a date filter is applied without a query, we need a default query.
-            # We can use the category if provided, otherwise a generic "news" term.
-            search_query = q or category or "top stories"
+    With `since`, only entries published after that cursor are returned,
+    oldest first. Every response carries a `next_cursor` to poll with next.
+    """
+    key = resolve_feed_key(q, from_date, to_date, language, region, category)
+    cursor = decode_since(since) if since else None
 
-            # If both q and category are present, combine them.
-            if q and category:
-                search_query = f"{q} {category}"
+    try:
+        # Pages of the same feed are sliced from one cached fetch
+        if feed is None:
+            feed = get_feed(key)
+        entries = feed.entries
 
-            try:
-                search_result = gn.search(search_query, from_=valid_from, to_=valid_to)
-            except Exception as e:
-                raise NewsFetchingError(f"The underlying news library failed on search: {e}")
+        # Paginate the results, over story clusters when requested. The
+        # first entry of a cluster, the highest ranked, represents it.
+        new = entries_since(feed, cursor)
+        if cluster:
+            groups = feed.story_clusters()
         else:
-            # Only fetch top news if no filters are applied.
-            try:
-                search_result = gn.top_news()
-            except Exception as e:
-                raise NewsFetchingError(f"The underlying news library failed on top_news: {e}")
-
-        if not search_result:
-            raise NewsFetchingError("News service did not return a result.")
-
-        entries = search_result.get('entries', [])
+            groups = [[i] for i in range(len(entries))]
+        if cursor is not None:
+            # Only stories with a new entry, ordered by their oldest one
+            position = {i: n for n, i in enumerate(new)}
+            groups = sorted(
+                (group for group in groups if any(i in position for i in group)),
+                key=lambda group: min(position.get(i, len(new)) for i in group)
+            )
+        paginated_groups = groups[start : start + num_results]
 
-        # Paginate the results
-        paginated_entries = entries[start : start + num_results]
+        # Every fetched article is searchable with source=local
+        index_feed(feed, q, language, region, category)
 
         article_list = []
-        for entry in paginated_entries:
-            description = clean_html(entry.get('summary', ''))
-            article = {
-                "title": entry.get('title'),
-                "url": entry.get('link'),
-                "source": entry.get('source', {}).get('title'),
-                "published": entry.get('published'),
-                "description": description,
-                "image": None,
-                "category": category if q else "top",
-                "language": language,
-                "region": region,
-            }
-            if include_sentiment:
-                sentiment_text = f"{article['title']}. {description}"
-                article['sentiment'] = sia.polarity_scores(sentiment_text)
+        for group in paginated_groups:
+            entry = entries[group[0]]
+            article = build_article(entry, q, language, region, category)
+            if cluster:
+                article["related"] = [
+                    {
+                        "title": entries[i].get('title'),
+                        "url": entries[i].get('link'),
+                        "source": entries[i].get('source', {}).get('title'),
+                        "published": entries[i].get('published'),
+                    }
+                    for i in group[1:]
+                ]
             article_list.append(article)
 
-        return {
+        if include_sentiment:
+            # Scored as one batch; articles seen before come from the memo
+            scores = score_texts([
+                article_text(article['title'], article['description'])
+                for article in article_list
+            ])
+            for article, score in zip(article_list, scores):
+                article['sentiment'] = score
+            news_index.add([(article, None) for article in article_list])
+
+        response = {
             "query": q or "top_headlines",
-            "total_articles": len(entries),
+            "total_articles": feed.total,
             "articles": article_list,
             "metadata": {
                 "generated_at": datetime.utcnow().isoformat() + "Z",
+                "fetched_at": feed.fetched_at.isoformat() + "Z",
+                "feed_complete": feed.complete,
+                "parsed_articles": len(entries),
             }
         }
+        if cluster:
+            response["total_stories"] = len(groups)
+        if cursor is not None:
+            response["new_articles"] = len(new)
+        response["next_cursor"] = next_since(
+            feed, cursor, new, {i for group in paginated_groups for i in group}
+        )
+        return response
 
     except Exception as e:
         raise NewsFetchingError(f"Error fetching news results: {e}")
+
+
+def date_timestamp(date_str: Optional[str]) -> Optional[int]:
+    """The Unix timestamp of midnight UTC on a YYYY-MM-DD date."""
+    if date_str is None:
+        return None
+    moment = datetime.strptime(date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def search_local_news(
+    q: Optional[str],
+    num_results: int,
+    start: int,
+    from_date: Optional[str],
+    to_date: Optional[str],
+    language: str,
+    region: str,
+    category: Optional[str],
+    include_sentiment: bool
+) -> Dict[str, Any]:
+    """
+    Answers a news query from the local index of recently fetched articles,
+    without calling Google News. Matches are ranked with BM25; without a
+    query or category the newest articles are returned.
+    """
+    from_ts = date_timestamp(validate_date_format(from_date))
+    to_ts = date_timestamp(validate_date_format(to_date))
+    query = " ".join(part for part in (q, category) if part)
+
+    total, article_list = news_index.search(
+        query, start, num_results, from_ts=from_ts, to_ts=to_ts,
+        language=language.lower(), region=region.upper()
+    )
+
+    if include_sentiment:
+        # Most articles carry the score they were indexed with
+        unscored = [article for article in article_list if article.get('sentiment') is None]
+        scores = score_texts([
+            article_text(article['title'], article['description'])
+            for article in unscored
+        ])
+        for article, score in zip(unscored, scores):
+            article['sentiment'] = score
+    else:
+        for article in article_list:
+            article.pop('sentiment', None)
+
+    return {
+        "query": q or "top_headlines",
+        "total_articles": total,
+        "articles": article_list,
+        "metadata": {
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "source": "local",
+            "indexed_articles": news_index.stats()["articles"],
+        }
+    }
+
+
+# Bucket widths (seconds) of the sentiment time series.
+SENTIMENT_INTERVALS = {"hour": 3600, "day": 86400}
+
+
+def sentiment_query(q: Optional[str], ticker: Optional[str]) -> Optional[str]:
+    """The news search behind a sentiment series: a query, or a ticker's news."""
+    if q and ticker:
+        raise InvalidQueryError("Provide either 'q' or 'ticker', not both.")
+    if ticker:
+        return f"{ticker.strip().upper()} stock"
+    return q
+
+
+def validate_interval(interval: str) -> str:
+    """Ensures a sentiment interval is one of SENTIMENT_INTERVALS."""
+    if interval not in SENTIMENT_INTERVALS:
+        raise InvalidQueryError(
+            f"Invalid interval '{interval}'. Use one of: {', '.join(SENTIMENT_INTERVALS)}."
+        )
+    return interval
+
+
+def get_sentiment_service(
+    query: Optional[str],
+    interval: str,
+    language: str,
+    region: str,
+    category: Optional[str],
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    feed: Optional[NewsFeed] = None
+) -> Dict[str, Any]:
+    """
+    Aggregates the sentiment of a feed's articles into a time series of
+    `interval` buckets. Uses the cached feed and memoized scores, so only
+    articles never scored before are run through VADER.
+    """
+    validate_interval(interval)
+    key = resolve_feed_key(query, from_date, to_date, language, region, category)
+
+    try:
+        if feed is None:
+            feed = get_feed(key)
+        dated = [
+            (entry, published)
+            for entry, published in zip(feed.entries, feed.published_times())
+            if published is not None
+        ]
+        timestamps = [published for _, published in dated]
+        scores = score_texts([
+            article_text(entry.get('title'), clean_html(entry.get('summary', '')))
+            for entry, _ in dated
+        ])
+
+        buckets = aggregate_scores(timestamps, scores, SENTIMENT_INTERVALS[interval])
+        for bucket in buckets:
+            bucket["start"] = datetime.fromtimestamp(
+                bucket["start"], timezone.utc
+            ).strftime('%Y-%m-%dT%H:%M:%SZ')
+        # The whole feed as one bucket
+        overall = aggregate_scores([0] * len(scores), scores, 1)
+        if overall:
+            del overall[0]["start"]
+
+        return {
+            "query": query or "top_headlines",
+            "interval": interval,
+            "total_articles": len(dated),
+            "overall": overall[0] if overall else None,
+            "buckets": buckets,
+            "metadata": {
+                "generated_at": datetime.utcnow().isoformat() + "Z",
+                "fetched_at": feed.fetched_at.isoformat() + "Z",
+                "feed_complete": feed.complete,
+            }
+        }
+
+    except Exception as e:
+        raise NewsFetchingError(f"Error computing news sentiment: {e}")
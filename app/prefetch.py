@@ -0,0 +1,214 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+# Whether popular keys are refreshed in the background ahead of expiry.
+PREFETCH_ENABLED = os.environ.get("SWIPE_PREFETCH", "1") != "0"
+
+# Upstream calls the scheduler may make per minute, across every kind of
+# key. Unused calls accumulate for at most PREFETCH_BURST_SECONDS.
+PREFETCH_BUDGET = int(os.environ.get("SWIPE_PREFETCH_BUDGET", 60))
+PREFETCH_BURST_SECONDS = 10
+
+# Seconds between scheduler passes.
+PREFETCH_INTERVAL = 2.0
+
+# Request counts decay with this half-life (seconds), so popularity
+# follows current traffic. Keys below PREFETCH_MIN_SCORE are never
+# refreshed, which leaves one-off requests alone.
+POPULARITY_HALF_LIFE = 600
+PREFETCH_MIN_SCORE = 3.0
+
+# Keys tracked per kind. When exceeded, the least popular half is dropped.
+MAX_TRACKED_KEYS = 2000
+
+# Refresh leads are randomized by this fraction, so keys cached together
+# are not all refreshed in the same pass.
+PREFETCH_JITTER = 0.3
+
+# Seconds a key is left alone after its refresh failed.
+FAILURE_BACKOFF = 60
+
+
+@dataclass
+class PrefetchTarget:
+    """How to keep one kind of key (tickers, feeds, queries) warm."""
+    # Seconds until the cached value for a key expires, None if not cached
+    remaining: Callable[[Any], Optional[float]]
+    # Reloads the value for a key into its cache
+    refresh: Callable[[Any], Awaitable[Any]]
+    # Seconds before expiry at which a key is refreshed
+    lead: float
+    # How many of the most popular keys are kept warm
+    hot_keys: int
+
+
+class Prefetcher:
+    """
+    Keeps the most requested keys of each upstream cached.
+
+    Routers `record` every request. A background task started with the
+    application periodically picks the most popular keys of every
+    registered kind and refreshes those about to expire, most popular
+    first, within a global budget of upstream calls.
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._targets: Dict[str, PrefetchTarget] = {}
+        # Per kind: key -> (score, time the score was last updated)
+        self._scores: Dict[str, Dict[Hashable, Tuple[float, float]]] = {}
+        self._running: set = set()
+        self._retry_at: Dict[Tuple[str, Hashable], float] = {}
+        self._tokens = self._capacity()
+        self._refilled_at = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.over_budget = 0
+
+    def register(self, kind: str, target: PrefetchTarget):
+        self._targets[kind] = target
+        self._scores.setdefault(kind, {})
+
+    @staticmethod
+    def _decayed(score: float, updated_at: float, now: float) -> float:
+        return score * 0.5 ** ((now - updated_at) / POPULARITY_HALF_LIFE)
+
+    def record(self, kind: str, key: Hashable):
+        """Counts one request for a key."""
+        if kind not in self._targets:
+            return
+        now = time.monotonic()
+        with self._lock:
+            scores = self._scores[kind]
+            score, updated_at = scores.get(key, (0.0, now))
+            scores[key] = (self._decayed(score, updated_at, now) + 1, now)
+            if len(scores) > MAX_TRACKED_KEYS:
+                ranked = sorted(
+                    scores, key=lambda k: self._decayed(*scores[k], now), reverse=True
+                )
+                for stale in ranked[MAX_TRACKED_KEYS // 2:]:
+                    del scores[stale]
+
+    def _hottest(self, now: float) -> List[Tuple[float, str, Hashable]]:
+        """The popular keys of every kind as (score, kind, key), best first."""
+        candidates = []
+        with self._lock:
+            for kind, scores in self._scores.items():
+                ranked = sorted(
+                    (
+                        (self._decayed(score, updated_at, now), kind, key)
+                        for key, (score, updated_at) in scores.items()
+                    ),
+                    key=lambda candidate: candidate[0],
+                    reverse=True
+                )
+                candidates.extend(
+                    candidate for candidate in ranked[:self._targets[kind].hot_keys]
+                    if candidate[0] >= PREFETCH_MIN_SCORE
+                )
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        return candidates
+
+    def _capacity(self) -> float:
+        """The most upstream calls that can be spent at once."""
+        return max(1.0, self.budget / 60 * PREFETCH_BURST_SECONDS)
+
+    def _take_budget(self, now: float) -> bool:
+        """Spends one upstream call from the budget, if any is left."""
+        self._tokens = min(
+            self._tokens + (now - self._refilled_at) * self.budget / 60,
+            self._capacity()
+        )
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def run_pass(self):
+        """Starts a refresh for every popular key close to expiry."""
+        now = time.monotonic()
+        for _, kind, key in self._hottest(now):
+            job = (kind, key)
+            if job in self._running:
+                continue
+            if job in self._retry_at:
+                if self._retry_at[job] > now:
+                    continue
+                del self._retry_at[job]
+            target = self._targets[kind]
+            remaining = target.remaining(key)
+            lead = target.lead * random.uniform(1 - PREFETCH_JITTER, 1 + PREFETCH_JITTER)
+            if remaining is not None and remaining > lead:
+                continue
+            if not self._take_budget(now):
+                # Hotter keys came first; the rest wait for the next pass
+                self.over_budget += 1
+                break
+            self._running.add(job)
+            asyncio.ensure_future(self._refresh(job, target))
+
+    async def _refresh(self, job: Tuple[str, Hashable], target: PrefetchTarget):
+        try:
+            await target.refresh(job[1])
+            self.refreshes += 1
+        except Exception:
+            # Busy pools and upstream errors are left for real requests
+            self.failures += 1
+            self._retry_at[job] = time.monotonic() + FAILURE_BACKOFF
+        finally:
+            self._running.discard(job)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(PREFETCH_INTERVAL * random.uniform(0.8, 1.2))
+            try:
+                self.run_pass()
+            except Exception:
+                # A failing lookup must not stop the scheduler for good
+                self.failures += 1
+
+    def start(self):
+        """Starts the scheduler. Called when the application starts."""
+        if PREFETCH_ENABLED and self.budget > 0 and self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def shutdown(self):
+        """Stops the scheduler. Called when the application shuts down."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        hot = self._hottest(now)
+        with self._lock:
+            tracked = {kind: len(scores) for kind, scores in self._scores.items()}
+        return {
+            "enabled": self._task is not None,
+            "budget_per_minute": self.budget,
+            "tracked": tracked,
+            "hot": {
+                kind: sum(1 for _, hot_kind, _ in hot if hot_kind == kind)
+                for kind in self._targets
+            },
+            "refreshing": len(self._running),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "over_budget": self.over_budget,
+        }
+
+
+prefetcher = Prefetcher(PREFETCH_BUDGET)
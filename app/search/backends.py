@@ -0,0 +1,250 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Dict, List
+
+from ddgs import DDGS
+from ddgs.engines import ENGINES
+from ddgs.exceptions import DDGSException, TimeoutException
+
+from app.executor import get_pool
+
+
+class BackendsUnavailableError(Exception):
+    """Custom exception for when no search backend could serve a page."""
+    pass
+
+
+# Encyclopedia engines answer quickly but with nothing for most queries,
+# so they are left out of the web result rotation.
+REFERENCE_BACKENDS = {"wikipedia", "grokipedia"}
+
+# Text backends DDGS can query, as listed by the library itself.
+SEARCH_BACKENDS = [name for name in ENGINES["text"] if name not in REFERENCE_BACKENDS]
+
+# Backends queried for each page. DDGS "auto" also settles on about two
+# engines per page of ten results.
+PAGE_FANOUT = 2
+
+# Calls older than this (seconds) no longer count towards a backend's
+# stats, so a backend that was failing gets retried once its record clears.
+STATS_WINDOW = 300
+
+# Calls kept per backend for the latency percentiles.
+STATS_SAMPLE_SIZE = 200
+
+# A backend failing more than this share of its recent calls, over at least
+# MIN_SAMPLES calls, is only used as a spare. A backend answering with no
+# results more than MAX_EMPTY_RATE of the time is ranked after the rest.
+MAX_ERROR_RATE = 0.5
+MAX_EMPTY_RATE = 0.5
+MIN_SAMPLES = 5
+
+# Seconds to wait on a backend before hedging while its p95 is unknown,
+# and the shortest wait ever used, so fast backends are not hedged on noise.
+DEFAULT_HEDGE_DELAY = 2.0
+MIN_HEDGE_DELAY = 0.3
+
+# Message DDGS raises with when a backend simply has no results.
+NO_RESULTS_MESSAGE = "No results found."
+
+
+class BackendHealth:
+    """
+    Rolling latency and error record for every DDGS text backend.
+
+    Backends are ranked healthy first, then those that usually return
+    results, then by median latency. Backends with no measured latency,
+    because they have no recent calls or only failed ones, come after the
+    measured ones and are reached as spares. Latencies only count calls
+    that returned results, as an empty answer is fast but useless. The p95
+    latency of each backend is the point at which a page fetch stops
+    waiting on it alone and hedges to a spare backend.
+    """
+
+    def __init__(self, backends: List[str]):
+        self._lock = threading.Lock()
+        # Per backend: (finished_at, latency, ok, empty) for recent calls
+        self._calls: Dict[str, deque] = {
+            name: deque(maxlen=STATS_SAMPLE_SIZE) for name in backends
+        }
+        self.hedges = 0
+
+    def record(self, backend: str, latency: float, ok: bool, empty: bool = False):
+        with self._lock:
+            self._calls[backend].append((time.monotonic(), latency, ok, empty))
+
+    def record_hedge(self):
+        with self._lock:
+            self.hedges += 1
+
+    def _recent(self, backend: str, now: float) -> List[tuple]:
+        """The calls still inside the window. Caller must hold the lock."""
+        calls = self._calls[backend]
+        while calls and calls[0][0] < now - STATS_WINDOW:
+            calls.popleft()
+        return list(calls)
+
+    @staticmethod
+    def _summary(calls: List[tuple]) -> Dict[str, Any]:
+        latencies = sorted(latency for _, latency, ok, empty in calls if ok and not empty)
+        errors = sum(1 for _, _, ok, _ in calls if not ok)
+        answers = len(calls) - errors
+        empty = sum(1 for _, _, ok, empty in calls if ok and empty)
+        summary = {
+            "calls": len(calls),
+            "errors": errors,
+            "error_rate": round(errors / len(calls), 3) if calls else 0.0,
+            "empty": empty,
+            "empty_rate": round(empty / answers, 3) if answers else 0.0,
+            "p50": latencies[(len(latencies) - 1) // 2] if latencies else None,
+            "p95": latencies[int((len(latencies) - 1) * 0.95)] if latencies else None,
+        }
+        summary["healthy"] = (
+            len(calls) < MIN_SAMPLES or summary["error_rate"] <= MAX_ERROR_RATE
+        )
+        summary["mostly_empty"] = (
+            answers >= MIN_SAMPLES and summary["empty_rate"] > MAX_EMPTY_RATE
+        )
+        return summary
+
+    def ranked(self) -> List[str]:
+        """Backends in the order they should be tried."""
+        now = time.monotonic()
+        with self._lock:
+            summaries = {
+                name: self._summary(self._recent(name, now)) for name in self._calls
+            }
+        return sorted(
+            summaries,
+            key=lambda name: (
+                not summaries[name]["healthy"],
+                summaries[name]["mostly_empty"],
+                summaries[name]["p50"] is None,
+                summaries[name]["p50"] or 0.0,
+            )
+        )
+
+    def hedge_delay(self, backend: str) -> float:
+        """Seconds to wait on a backend before also asking a spare."""
+        with self._lock:
+            calls = self._recent(backend, time.monotonic())
+        summary = self._summary(calls)
+        if summary["p95"] is None or len(calls) < MIN_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        return max(summary["p95"], MIN_HEDGE_DELAY)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            summaries = {
+                name: self._summary(self._recent(name, now)) for name in self._calls
+            }
+            hedges = self.hedges
+        for summary in summaries.values():
+            for key in ("p50", "p95"):
+                if summary[key] is not None:
+                    summary[key] = round(summary[key] * 1000, 1)
+        return {"hedges": hedges, "backends": summaries}
+
+
+backend_health = BackendHealth(SEARCH_BACKENDS)
+
+
+def query_backend(
+    ddgs: DDGS, backend: str, q: str, region: str, safesearch: str, page: int
+) -> List[Dict[str, Any]]:
+    """Fetches one page from a single backend, recording how it went."""
+    started = time.monotonic()
+    try:
+        results = ddgs.text(
+            query=q, region=region, safesearch=safesearch, page=page, backend=backend
+        )
+    except TimeoutException:
+        backend_health.record(backend, time.monotonic() - started, False)
+        raise
+    except DDGSException as e:
+        if str(e) == NO_RESULTS_MESSAGE:
+            backend_health.record(backend, time.monotonic() - started, True, empty=True)
+            return []
+        backend_health.record(backend, time.monotonic() - started, False)
+        raise
+    except Exception:
+        backend_health.record(backend, time.monotonic() - started, False)
+        raise
+    backend_health.record(backend, time.monotonic() - started, True, empty=not results)
+    return results
+
+
+def fetch_hedged_page(
+    ddgs: DDGS, q: str, region: str, safesearch: str, page: int
+) -> List[Dict[str, Any]]:
+    """
+    Fetches one page from the PAGE_FANOUT best backends, hedging slow ones.
+
+    When a backend fails, answers with no results, or is still running past
+    its own p95 latency, the next spare backend is queried as well. The
+    page is complete once PAGE_FANOUT backends have returned results or
+    every backend tried has finished; it is empty only if no backend had
+    results and none failed, as a failure may have hidden more results.
+    Results are returned in backend rank order, whichever answered first.
+    Backends that are still running are left to finish in the background
+    so their latency is still recorded.
+    """
+    pool = get_pool("search_backends")
+    ranked = backend_health.ranked()
+    spares = ranked[PAGE_FANOUT:]
+    pending: Dict[Any, str] = {}
+    deadlines: Dict[Any, float] = {}
+
+    def launch(backend: str):
+        future = pool.submit(query_backend, ddgs, backend, q, region, safesearch, page)
+        pending[future] = backend
+        deadlines[future] = time.monotonic() + backend_health.hedge_delay(backend)
+
+    for backend in ranked[:PAGE_FANOUT]:
+        launch(backend)
+
+    answers: Dict[str, List[Dict[str, Any]]] = {}
+    errors: List[Exception] = []
+    while pending and len(answers) < PAGE_FANOUT:
+        now = time.monotonic()
+        timeout = max(0.0, min(deadlines.values()) - now) if deadlines else None
+        done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            backend = pending.pop(future)
+            deadlines.pop(future, None)
+            try:
+                results = future.result()
+            except Exception as e:
+                errors.append(e)
+                results = None
+            if results:
+                answers[backend] = results
+                continue
+            # Neither a failure nor an empty answer fills a slot of the fanout
+            if spares:
+                launch(spares.pop(0))
+
+        # Hedge each backend that has run past its deadline, once
+        now = time.monotonic()
+        for future, deadline in list(deadlines.items()):
+            if deadline <= now:
+                del deadlines[future]
+                if spares:
+                    backend_health.record_hedge()
+                    launch(spares.pop(0))
+
+    if not answers and errors:
+        if all(isinstance(e, TimeoutException) for e in errors):
+            raise TimeoutException(errors[-1])
+        raise BackendsUnavailableError(
+            f"No search backend could serve page {page}: {errors[-1]}"
+        )
+
+    results = []
+    for backend in ranked:
+        results.extend(answers.get(backend) or [])
+    return results
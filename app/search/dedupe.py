@@ -0,0 +1,133 @@
+import hashlib
+import re
+import urllib.parse
+from typing import Dict, List, Set
+
+import numpy as np
+
+
+# Query parameters that only track the visit and never change the page.
+TRACKING_PARAMS = {
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid", "mc_cid",
+    "mc_eid", "ref_src", "ref_url", "spm", "_ga", "_gl", "cmpid", "amp",
+    "outputtype",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+
+# Host prefixes of mobile and AMP mirrors, dropped along with `www.`.
+MIRROR_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Fingerprint size, and the Hamming distance at or below which two results
+# are considered the same page.
+SIMHASH_BITS = 64
+NEAR_DUPLICATE_DISTANCE = 3
+
+# Texts with fewer tokens than this are too short to fingerprint reliably.
+MIN_SIMHASH_TOKENS = 6
+
+# The fingerprint is split into this many bands for the index. Two
+# fingerprints within NEAR_DUPLICATE_DISTANCE bits of each other share at
+# least one band exactly, so only fingerprints sharing a band are compared.
+SIMHASH_BANDS = NEAR_DUPLICATE_DISTANCE + 1
+
+_TOKEN_RE = re.compile(r"\w{2,}")
+
+
+def canonical_url(url: str) -> str:
+    """
+    Reduces a URL to a key shared by its trivial variants: scheme, `www.`
+    and mobile/AMP hosts, default ports, trailing slashes, fragments,
+    tracking parameters and AMP paths are all ignored.
+    """
+    try:
+        parts = urllib.parse.urlsplit(url.strip())
+    except ValueError:
+        return url
+
+    host = (parts.hostname or "").lower()
+    path = parts.path
+
+    # Google AMP cache links wrap the original URL in their path
+    if host.endswith("google.com") and path.startswith("/amp/s/"):
+        return canonical_url("https://" + path[len("/amp/s/"):])
+
+    for prefix in MIRROR_HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/amp/?$", "/", path)
+    path = re.sub(r"\.amp(\.html?)$", r"\1", path)
+    path = path.rstrip("/")
+
+    query = sorted(
+        (key, value)
+        for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+        and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    canonical = host + path
+    if query:
+        canonical += "?" + urllib.parse.urlencode(query)
+    return canonical
+
+
+def simhash(text: str) -> int:
+    """
+    Computes a 64-bit SimHash over the words and word pairs of a text.
+    Returns 0 when the text is too short to fingerprint.
+    """
+    words = _TOKEN_RE.findall(text.lower())
+    if len(words) < MIN_SIMHASH_TOKENS:
+        return 0
+    tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    digests = b"".join(
+        hashlib.blake2b(token.encode(), digest_size=8).digest() for token in tokens
+    )
+    # One row of 64 bits per token; each bit votes +1 or -1
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(len(tokens), SIMHASH_BITS)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(tokens)
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), "big")
+
+
+def _bands(fingerprint: int) -> List[int]:
+    width = SIMHASH_BITS // SIMHASH_BANDS
+    mask = (1 << width) - 1
+    return [(fingerprint >> (i * width)) & mask for i in range(SIMHASH_BANDS)]
+
+
+class DuplicateFilter:
+    """
+    Remembers the results seen for one search and spots repeats.
+
+    A result is a duplicate if its canonical URL was seen, or if the SimHash
+    of its title and description is within NEAR_DUPLICATE_DISTANCE bits of
+    one already seen. Fingerprints are indexed by band, so each check
+    compares against a handful of candidates rather than every result.
+    """
+
+    def __init__(self):
+        self._urls: Set[str] = set()
+        self._bands: List[Dict[int, List[int]]] = [{} for _ in range(SIMHASH_BANDS)]
+
+    def add(self, url: str, text: str) -> bool:
+        """Records a result. Returns False if it duplicates an earlier one."""
+        key = canonical_url(url)
+        if key in self._urls:
+            return False
+
+        fingerprint = simhash(text)
+        bands = _bands(fingerprint) if fingerprint else []
+        for band, value in enumerate(bands):
+            for other in self._bands[band].get(value, ()):
+                if (fingerprint ^ other).bit_count() <= NEAR_DUPLICATE_DISTANCE:
+                    return False
+
+        self._urls.add(key)
+        for band, value in enumerate(bands):
+            self._bands[band].setdefault(value, []).append(fingerprint)
+        return True
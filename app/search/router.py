@@ -1,17 +1,43 @@
+import asyncio
+import json
 from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
-from .services import search_service, SearchError, EmptyQueryError, \
-    ALL_FIELDS
+from .services import search_service, stream_search_service, SearchError, \
+    EmptyQueryError, ALL_FIELDS, search_batch_service, result_set_key
 from app.limiter import limiter
+from app.executor import get_pool, run_upstream, UpstreamBusyError
+from app.prefetch import prefetcher
 
 router = APIRouter()
 
 
+class BatchSearchQuery(BaseModel):
+    """One search of a batch request."""
+    q: str = Field(..., description="The search query string.")
+    num_results: int = Field(10, ge=1, le=100, description="The maximum number of results to return.")
+    start: int = Field(0, ge=0, description="The starting index of the results.")
+    language: str = Field("en", description="The language to use for the search.")
+    safe: bool = Field(True, description="Set to false to disable SafeSearch.")
+    include_rank: bool = Field(False, description="Set to true to include the result rank.")
+    fields: Optional[List[str]] = Field(
+        None, description=f"The fields to return. Available fields: {', '.join(ALL_FIELDS)}."
+    )
+
+
+class BatchSearchRequest(BaseModel):
+    """Request body for the batch search endpoint."""
+    queries: List[BatchSearchQuery] = Field(..., description="The searches to run.")
+
+
 @router.get("/", response_model=Dict[str, Any])
 @limiter.limit("60/minute")
 async def perform_search(
     request: Request,
-    q: str = Query(..., description="The search query string."),
+    q: Optional[str] = Query(
+        None, description="The search query string. Required unless `cursor` is given."
+    ),
     num_results: int = Query(
         10, ge=1, le=100, description="The maximum number of results to return."
     ),
@@ -32,6 +58,16 @@ async def perform_search(
         description="A comma-separated list of fields to return. "
                     f"Available fields: {', '.join(ALL_FIELDS)}. "
                     "Defaults to all fields."
+    ),
+    cursor: Optional[str] = Query(
+        None,
+        description="The `next_cursor` of a previous response, to fetch the "
+                    "following results of the same search."
+    ),
+    stream: bool = Query(
+        False,
+        description="Set to true to receive results as newline-delimited JSON "
+                    "while pages arrive, followed by a trailer record."
     )
 ):
     """
@@ -39,23 +75,97 @@ async def perform_search(
 
     This endpoint provides the URL, title, and description for each result.
     """
+    params = dict(
+        q=q,
+        num_results=num_results,
+        start=start,
+        language=language,
+        safe=safe,
+        include_rank=include_rank,
+        fields=fields,
+        cursor=cursor
+    )
+    if q and q.strip() and not cursor:
+        prefetcher.record("search", result_set_key(q, language, safe))
     try:
-        results = search_service(
-            q=q,
-            num_results=num_results,
-            start=start,
-            language=language,
-            safe=safe,
-            include_rank=include_rank,
-            fields=fields
-        )
-        return {"results": results}
+        if stream:
+            return await _stream_search(params)
+        response = await run_upstream("search", search_service, **params)
+        return response
     except EmptyQueryError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except SearchError as e:
         raise HTTPException(status_code=503, detail=str(e))
+    except UpstreamBusyError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"An unexpected error occurred: {e}"
+        )
+
+
+async def _stream_search(params: Dict[str, Any]) -> StreamingResponse:
+    """
+    Runs a search on the search pool and streams its results as NDJSON.
+
+    The response starts with the first result, so errors raised before it
+    (validation, upstream failures) still become regular error responses.
+    An error after that is sent as a final `{"error": ...}` line.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    def emit(item: Any):
+        loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    get_pool("search").submit(stream_search_service, emit, **params)
+    first = await queue.get()
+    if isinstance(first, Exception):
+        raise first
+
+    async def lines():
+        item = first
+        while True:
+            if isinstance(item, Exception):
+                yield json.dumps({"error": str(item)}) + "\n"
+                return
+            yield json.dumps(item) + "\n"
+            if item.get("done"):
+                return
+            item = await queue.get()
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/batch", response_model=Dict[str, Any])
+@limiter.limit("30/minute")
+async def perform_batch_search(request: Request, body: BatchSearchRequest):
+    """
+    Runs several searches in one call.
+
+    Results are returned in the order of the queries. A query that fails
+    has an `error` field instead of `results`, and the others still succeed.
+    """
+    queries = [
+        {**query.model_dump(), "fields": ",".join(query.fields) if query.fields else None}
+        for query in body.queries
+    ]
+    try:
+        return await run_upstream("search", search_batch_service, queries=queries)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UpstreamBusyError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
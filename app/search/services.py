@@ -1,7 +1,19 @@
 from ddgs import DDGS
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Set, Tuple
+import base64
+import binascii
+import json
+import math
+import threading
+import time
 import urllib.parse
 
+from app.cache import SingleFlight, TTLCache
+from app.executor import run_upstream, submit_all, UpstreamBusyError
+from app.prefetch import prefetcher, PrefetchTarget
+from .backends import fetch_hedged_page
+from .dedupe import DuplicateFilter
+
 
 class SearchError(Exception):
     """Custom exception for errors during a search."""
@@ -15,20 +27,330 @@ class EmptyQueryError(Exception):
 
 ALL_FIELDS = ["url", "title", "description", "source", "rank"]
 
+# Map language to region code
+REGION_MAP = {
+    'en': 'us-en',
+    'es': 'es-es',
+    'fr': 'fr-fr',
+    'de': 'de-de',
+    'ja': 'jp-jp',
+    'zh': 'cn-zh',
+    'ru': 'ru-ru',
+    'pt': 'br-pt',
+    'it': 'it-it'
+}
+
+# Deepest DDGS page a search will request.
+MAX_PAGES = 15
+
+# Starting guess for the number of new unique results a page yields, used
+# until enough searches have been observed. DDGS returns 10 per page.
+DEFAULT_RESULTS_PER_PAGE = 10.0
+
+# Weight of the newest page in the moving average of results per page.
+PAGE_ESTIMATE_ALPHA = 0.1
+
+
+class PageYieldEstimator:
+    """
+    Tracks how many new unique results a DDGS page adds, as an exponential
+    moving average over recent searches. Used to work out how many pages a
+    request needs so they can all be fetched at once.
+    """
+
+    def __init__(self, initial: float, alpha: float):
+        self.alpha = alpha
+        self._estimate = initial
+        self._lock = threading.Lock()
+
+    def record(self, new_results: int):
+        with self._lock:
+            self._estimate += self.alpha * (new_results - self._estimate)
+
+    def pages_for(self, missing: int) -> int:
+        """The number of pages expected to yield `missing` more results."""
+        with self._lock:
+            per_page = max(self._estimate, 1.0)
+        return max(1, math.ceil(missing / per_page))
+
+
+page_yield = PageYieldEstimator(DEFAULT_RESULTS_PER_PAGE, PAGE_ESTIMATE_ALPHA)
+
+# Accumulated results are kept this long (seconds), so paging through a
+# search reuses the pages already fetched.
+RESULT_SET_TTL = 600
+RESULT_SET_CACHE_SIZE = 512
+
+
+def normalize_query(q: str) -> str:
+    """Collapses whitespace so trivially different queries share a result set."""
+    return " ".join(q.split())
+
+
+def encode_cursor(q: str, language: str, safe: bool, start: int) -> str:
+    """Builds the opaque cursor that resumes a search at `start`."""
+    payload = json.dumps([q, language, safe, start], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str, bool, int]:
+    """Reads a cursor made by `encode_cursor`, rejecting malformed ones."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        q, language, safe, start = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(q, str) or not isinstance(start, int) or start < 0:
+            raise ValueError
+        return q, str(language), bool(safe), start
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError("Invalid cursor.")
+
+
+def merge_page(
+    page_data: List[Dict[str, Any]],
+    results: List[Dict[str, Any]],
+    duplicates: DuplicateFilter
+) -> int:
+    """
+    Appends the results of a page that are neither the same URL as an
+    earlier result nor a near-duplicate of one. Returns how many were new.
+    """
+    added = 0
+    for result in page_data:
+        url = result.get('href', result.get('url', ''))
+        text = f"{result.get('title', '')} {result.get('body', result.get('description', ''))}"
+        if url and duplicates.add(url, text):
+            results.append(result)
+            added += 1
+    return added
+
+
+class ResultSet:
+    """
+    The unique results gathered so far for one (query, region, safesearch),
+    and the page where fetching left off.
+
+    A result set is cached and shared by every request paging through the
+    same search, so each upstream page is fetched once and later offsets
+    only extend the list when it is too short. The lock serializes
+    extensions; concurrent requests wait for the one fetching and then
+    read what it found.
+    """
+
+    def __init__(self):
+        self.results: List[Dict[str, Any]] = []
+        self.duplicates = DuplicateFilter()
+        self.next_page = 1
+        self.exhausted = False
+        self.lock = threading.Lock()
+
+    def slice(
+        self,
+        ddgs: DDGS,
+        q: str,
+        region: str,
+        safesearch: str,
+        start: int,
+        num_results: int,
+        on_results: Optional[Callable[[int, List[Dict[str, Any]]], None]] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Returns the results in [start, start + num_results), fetching more
+        pages if needed, and whether any results exist past the slice.
+
+        `on_results` is called with a position and the results from there
+        on as soon as they are known: once for those already held, then
+        after every page merged.
+        """
+        needed = start + num_results
+
+        def deliver(begin: int):
+            lo, hi = max(begin, start), min(len(self.results), needed)
+            if lo < hi:
+                on_results(lo, self.results[lo:hi])
+
+        with self.lock:
+            if on_results:
+                deliver(start)
+            if len(self.results) < needed and not self.exhausted:
+                self._extend(
+                    ddgs, q, region, safesearch, needed,
+                    deliver if on_results else None
+                )
+            has_more = len(self.results) > needed or not self.exhausted
+            return self.results[start:needed], has_more
+
+    def _extend(
+        self,
+        ddgs: DDGS,
+        q: str,
+        region: str,
+        safesearch: str,
+        needed: int,
+        on_page: Optional[Callable[[int], None]] = None
+    ):
+        """
+        Fetches pages until at least `needed` unique results are held, or
+        the backends run out.
+
+        Each round fetches every page the estimate says is still missing in
+        parallel, so a deep offset costs roughly one page latency rather
+        than the sum of them. Pages are merged in page order to keep the
+        ranking deterministic. As soon as enough results are in, pages that
+        already arrived are kept and the rest are cancelled.
+
+        Only an empty page closes the set. A page that fails leaves it open
+        for a later request to retry, and an overloaded pool is reported as
+        UpstreamBusyError.
+        """
+        while len(self.results) < needed and not self.exhausted:
+            window = min(
+                page_yield.pages_for(needed - len(self.results)),
+                MAX_PAGES - self.next_page + 1
+            )
+            futures = submit_all("search_pages", [
+                (fetch_hedged_page, (ddgs, q, region, safesearch, page), {})
+                for page in range(self.next_page, self.next_page + window)
+            ])
+            stalled = False
+            try:
+                for future in futures:
+                    # Once the request is covered, only take pages that are
+                    # already here rather than waiting on the others
+                    if len(self.results) >= needed and not future.done():
+                        break
+                    try:
+                        page_data = future.result()
+                    except UpstreamBusyError:
+                        raise
+                    except Exception:
+                        # Leave the set open so a later request can retry
+                        stalled = True
+                        break
+
+                    if not page_data:
+                        self.exhausted = True
+                        break
+
+                    merged_from = len(self.results)
+                    added = merge_page(page_data, self.results, self.duplicates)
+                    page_yield.record(added)
+                    self.next_page += 1
+                    if on_page:
+                        on_page(merged_from)
+            finally:
+                for future in futures:
+                    future.cancel()
+            if self.next_page > MAX_PAGES:
+                self.exhausted = True
+            if stalled:
+                break
+
+
+result_sets = TTLCache("search_results", RESULT_SET_CACHE_SIZE, RESULT_SET_TTL)
+
+# Identical searches running at the same time share one upstream fetch,
+# keyed by the upstream parameters and how deep the results must go.
+search_flight = SingleFlight("search")
+
+# Most queries one batch request can carry. They run on the shared
+# "search_batch" pool.
+MAX_BATCH_QUERIES = 50
+
+
+def format_result(
+    result: Dict[str, Any],
+    rank: int,
+    requested_fields: Set[str],
+    include_rank: bool
+) -> Dict[str, Any]:
+    """Builds the response entry for a raw DDGS result."""
+    # DDGS returns dict with keys that vary by backend
+    url = result.get('href', result.get('url', ''))
+    title = result.get('title', '')
+    description = result.get('body', result.get('description', ''))
+
+    full_data = {
+        "url": url,
+        "title": title,
+        "description": description,
+        "source": urllib.parse.urlparse(url).netloc if url else '',
+        "rank": rank
+    }
+
+    # Filter the data to only include the fields the user asked for.
+    res_dict = {
+        key: value for key, value in full_data.items()
+        if key in requested_fields
+    }
+
+    # The 'rank' field is special; it's only included if the
+    # `include_rank` flag is True, even if 'rank' is in fields.
+    if not include_rank and "rank" in res_dict:
+        del res_dict["rank"]
+
+    return res_dict
+
+
+def result_set_key(q: str, language: str, safe: bool) -> Tuple[str, str, str]:
+    """The (query, region, safesearch) a search's result set is cached under."""
+    return normalize_query(q), REGION_MAP.get(language, 'us-en'), 'moderate' if safe else 'off'
+
+
+# The most requested searches kept warm by the prefetcher, how many results
+# it fetches for each, and how many seconds before expiry it does so.
+PREFETCH_QUERIES = 10
+PREFETCH_RESULTS = 10
+SEARCH_PREFETCH_LEAD = 60
+
+
+def refresh_result_set(key: Tuple[str, str, str]):
+    """
+    Fetches the first results of a search into a new result set and, once
+    that succeeded, caches it in place of the old one. Requests already
+    reading the old set keep using it.
+    """
+    q, region, safesearch = key
+    result_set = ResultSet()
+    result_set.slice(DDGS(), q, region, safesearch, 0, PREFETCH_RESULTS)
+    if not result_set.results:
+        raise SearchError(f"No results to prefetch for '{q}'.")
+    result_sets.set(key, result_set)
+
+
+prefetcher.register("search", PrefetchTarget(
+    remaining=result_sets.remaining,
+    refresh=lambda key: run_upstream("search", refresh_result_set, key),
+    lead=SEARCH_PREFETCH_LEAD,
+    hot_keys=PREFETCH_QUERIES
+))
+
 
 def search_service(
-    q: str,
+    q: Optional[str],
     num_results: int,
     start: int,
     language: str,
     safe: bool,
     include_rank: bool,
-    fields: Optional[str]
-) -> List[Dict[str, Any]]:
+    fields: Optional[str],
+    cursor: Optional[str] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ddgs: Optional[DDGS] = None
+) -> Dict[str, Any]:
     """
     Main service to perform a web search using DDGS (metasearch), aggregating results
     from multiple backends (DuckDuckGo, Bing, Google, etc.) for better reliability.
+
+    A `cursor` from a previous response resumes that search where it ended,
+    replacing `q`, `start`, `language` and `safe`. When `on_result` is given,
+    each result is also passed to it, in rank order, as soon as its page
+    has been merged. A `ddgs` client can be passed in to share its
+    connections between searches.
     """
+    if cursor:
+        q, language, safe, start = decode_cursor(cursor)
+
+    q = normalize_query(q or "")
     if not q:
         raise EmptyQueryError("Search query cannot be empty.")
 
@@ -48,121 +370,62 @@ def search_service(
 
         # Use DDGS with appropriate parameters
         try:
-            # Map language to region code
-            region_map = {
-                'en': 'us-en',
-                'es': 'es-es',
-                'fr': 'fr-fr',
-                'de': 'de-de',
-                'ja': 'jp-jp',
-                'zh': 'cn-zh',
-                'ru': 'ru-ru',
-                'pt': 'br-pt',
-                'it': 'it-it'
-            }
-            region = region_map.get(language, 'us-en')
-            
-            # Map safe parameter to safesearch level
-            safesearch = 'moderate' if safe else 'off'
-            
-            # Pagination logic
-            # We assume a base page size of roughly 10-20 results per page call,
-            # but since we are using 'all' backends, we might get more.
-            # We will fetch pages sequentially and accumulate unique results.
-            
-            ddgs = DDGS()
-            page_results_list = []
-            seen_urls = set()
-
-            # Start fetching from page 1, regardless of 'start' parameter, because
-            # we need to build our own index since different engines paginate differently.
-            # However, to be efficient, we can estimate start page.
-            # But with multiple engines aggregating, page 1 might return 50 results.
-            # So start_page = 1 is safest to ensure we don't miss anything,
-            # especially since we deduplicate.
-
-            current_page = 1
-
-            # Safety break to avoid infinite loops - fetch at most enough pages to cover the request
-            # Heuristic: max 10 pages deep or until we have enough results
-            while len(page_results_list) < start + num_results:
-                # Use backend="api" which tends to cover multiple sources or "auto"
-                # The user asked for "all backends". backend="html" is also an option.
-                # ddgs "text" method defaults to backend="api" if not specified?
-                # No, default is "auto". Let's use "auto" which uses all available engines.
-                try:
-                    page_data = ddgs.text(
-                        query=q,
-                        region=region,
-                        safesearch=safesearch,
-                        page=current_page,
-                        backend="auto"
-                    )
-                except Exception:
-                    # If a page fetch fails, try continuing or break?
-                    # If page 1 fails completely, we might have issues.
-                    # But ddgs usually handles individual engine failures.
-                    break
-
-                if not page_data:
-                    break
-
-                # Deduplicate and add to list
-                for result in page_data:
-                    url = result.get('href', result.get('url', ''))
-                    if url and url not in seen_urls:
-                        seen_urls.add(url)
-                        page_results_list.append(result)
-
-                current_page += 1
-
-                # Safety break
-                if current_page > 15:
-                    break
-
-            # Extract the slice we need
-            # If we don't have enough results to cover 'start', we return empty or what we have
-            if start >= len(page_results_list):
-                results_to_process = []
+            # The region follows the language, and `safe` maps to a
+            # safesearch level
+            key = result_set_key(q, language, safe)
+            _, region, safesearch = key
+
+            # Different engines paginate differently, so we build our own
+            # index of unique results starting from page 1 and slice it.
+            # The index is cached, so later offsets only fetch new pages.
+            def emit_results(position: int, batch: List[Dict[str, Any]]):
+                for offset, result in enumerate(batch):
+                    on_result(format_result(
+                        result, position + offset + 1,
+                        requested_fields, include_rank
+                    ))
+
+            emit = emit_results if on_result else None
+
+            ddgs = ddgs or DDGS()
+            result_set = result_sets.get_or_load(key, ResultSet)
+            if emit:
+                results_to_process, has_more = result_set.slice(
+                    ddgs, q, region, safesearch, start, num_results, emit
+                )
             else:
-                results_to_process = page_results_list[start : start + num_results]
-            
+                # Concurrent identical searches wait for one fetch, then
+                # each takes its own slice of what it found
+                results, has_more = search_flight.do(
+                    key + (start + num_results,),
+                    lambda: result_set.slice(
+                        ddgs, q, region, safesearch, 0, start + num_results
+                    )
+                )
+                results_to_process = results[start:]
+
+        except UpstreamBusyError:
+            raise
         except Exception as e:
             # If the search library itself fails, raise a specific error.
             raise SearchError(f"The underlying search library failed: {e}")
 
         # Process and filter results
-        response_list = []
-        
-        for i, result in enumerate(results_to_process):
-            # DDGS returns dict with keys that vary by backend
-            url = result.get('href', result.get('url', ''))
-            title = result.get('title', '')
-            description = result.get('body', result.get('description', ''))
-            
-            full_data = {
-                "url": url,
-                "title": title,
-                "description": description,
-                "source": urllib.parse.urlparse(url).netloc if url else '',
-                "rank": start + i + 1
-            }
-
-            # Filter the data to only include the fields the user asked for.
-            res_dict = {
-                key: value for key, value in full_data.items()
-                if key in requested_fields
-            }
-
-            # The 'rank' field is special; it's only included if the
-            # `include_rank` flag is True, even if 'rank' is in fields.
-            if not include_rank and "rank" in res_dict:
-                del res_dict["rank"]
-
-            response_list.append(res_dict)
-
-        return response_list
+        response_list = [
+            format_result(result, start + i + 1, requested_fields, include_rank)
+            for i, result in enumerate(results_to_process)
+        ]
 
+        next_start = start + num_results
+        return {
+            "results": response_list,
+            "next_cursor": (
+                encode_cursor(q, language, safe, next_start) if has_more else None
+            ),
+        }
+
+    except UpstreamBusyError:
+        raise
     except ValueError as e:
         # Re-raise validation errors (e.g., invalid fields) to be caught
         # by the router, which will return a 400 Bad Request.
@@ -170,3 +433,55 @@ def search_service(
     except Exception as e:
         # Catch any other exceptions during the search process.
         raise SearchError(f"Error fetching search results: {e}")
+
+
+def stream_search_service(emit: Callable[[Any], None], **params) -> None:
+    """
+    Runs `search_service`, passing each result to `emit` as soon as it is
+    known and then a trailer record with the totals. A failure is emitted as
+    the exception itself, so the caller can still turn errors raised before
+    the first result into a regular error response.
+    """
+    started = time.monotonic()
+    try:
+        response = search_service(on_result=emit, **params)
+    except Exception as e:
+        emit(e)
+        return
+    emit({
+        "done": True,
+        "returned": len(response["results"]),
+        "next_cursor": response["next_cursor"],
+        "elapsed_ms": round((time.monotonic() - started) * 1000),
+    })
+
+
+def search_batch_service(queries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Runs several searches concurrently, sharing one DDGS client so its
+    connections are reused. Each item of `queries` holds the keyword
+    arguments of `search_service`. Results come back in request order; a
+    query that fails carries an `error` instead of `results` without
+    failing the rest of the batch.
+    """
+    if not queries:
+        raise ValueError("At least one query must be provided.")
+    if len(queries) > MAX_BATCH_QUERIES:
+        raise ValueError(
+            f"A batch can contain at most {MAX_BATCH_QUERIES} queries."
+        )
+
+    ddgs = DDGS()
+    futures = submit_all("search_batch", [
+        (search_service, (), dict(params, ddgs=ddgs)) for params in queries
+    ])
+
+    items = []
+    for params, future in zip(queries, futures):
+        item = {"q": params.get("q")}
+        try:
+            item.update(future.result())
+        except Exception as e:
+            item["error"] = str(e)
+        items.append(item)
+    return {"results": items}